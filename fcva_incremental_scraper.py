@@ -5,108 +5,288 @@ FCVA Incremental Video ID Scanner
 Starting from a known video ID, scan incrementally to find all available videos
 """
 
-import requests
+import asyncio
+import httpx
 import json
+import re
+import socket
+import sqlite3
+import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from aiolimiter import AsyncLimiter
+from tqdm import tqdm
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def check_video_exists(video_id):
+MAX_WORKERS = 20
+REQUESTS_PER_SECOND = 20  # Token bucket cap on outgoing probes
+MAX_CONNECTIONS = 4  # Few connections so HTTP/2 multiplexes the probes over each
+VALID_STATUSES = {200, 301, 302, 303, 307, 308}
+GAP_TOLERANCE = 20  # A run of this many missing IDs is treated as the end of the list
+
+GRANICUS_HOST = "fcva.granicus.com"
+INDEX_URL = f"https://{GRANICUS_HOST}/ViewPublisher.php?view_id=1"
+
+# Archive listings link clips as /player/clip/<id> or MediaPlayer.php?clip_id=<id>
+CLIP_RE = re.compile(r'(?:/clip/|clip_id=)(\d+)')
+
+# Process-wide DNS cache: every probe goes to the same Granicus host, so
+# resolve each (host, port) once and serve later TCP lookups from memory
+# instead of sending thousands of queries to the system resolver
+_system_getaddrinfo = socket.getaddrinfo
+
+@lru_cache(maxsize=32)
+def _resolve(host, port):
+    return tuple(_system_getaddrinfo(host, port, 0, socket.SOCK_STREAM))
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    if type not in (0, socket.SOCK_STREAM) or proto not in (0, socket.IPPROTO_TCP):
+        return _system_getaddrinfo(host, port, family, type, proto, flags)
+    infos = [info for info in _resolve(host, port) if family in (0, info[0])]
+    return infos or _system_getaddrinfo(host, port, family, type, proto, flags)
+
+socket.getaddrinfo = _cached_getaddrinfo
+
+def prime_dns_cache(host=GRANICUS_HOST):
+    """Resolve the Granicus host once before scanning"""
+    try:
+        _resolve(host, 443)
+    except socket.gaierror as e:
+        print(f"⚠️  Could not resolve {host}: {e}")
+
+CACHE_PATH = 'probe_cache.sqlite'
+NEGATIVE_CACHE_TTL = 30 * 24 * 3600  # Re-probe a 404 after 30 days
+
+class ProbeCache:
+    """On-disk record of probe results so re-runs skip IDs already proven missing"""
+    def __init__(self, path=CACHE_PATH, fresh=False):
+        # Every probe runs on the one event loop thread, so a single
+        # connection is enough and needs no locking
+        self.fresh = fresh
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (vid_id INTEGER PRIMARY KEY, status INTEGER, ts INTEGER)"
+        )
+    
+    def is_known_missing(self, video_id):
+        if self.fresh:
+            return False
+        row = self.conn.execute("SELECT status, ts FROM cache WHERE vid_id=?", (video_id,)).fetchone()
+        return bool(row) and row[0] == 404 and time.time() - row[1] < NEGATIVE_CACHE_TTL
+    
+    def record(self, video_id, status):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cache (vid_id, status, ts) VALUES (?, ?, ?)",
+            (video_id, status, int(time.time()))
+        )
+    
+    def commit(self):
+        self.conn.commit()
+
+_probe_cache = None
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+}
+
+def save_video_ids(video_ids, filename='video_ids.json'):
+    """Write video IDs as an indented JSON list, via orjson when available"""
+    if orjson:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(video_ids, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(video_ids, f, indent=2)
+
+def create_client():
+    """Build the one HTTP/2 client shared by every request in a run
+
+    Reusing it across the index fetch and every scan phase keeps the
+    keep-alive connections and TLS sessions warm between phases.
+    """
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    return httpx.AsyncClient(http2=True, limits=limits, headers=HEADERS, timeout=10)
+
+async def check_video_exists(client, video_id):
     """Check if a video ID exists by testing the Granicus URL"""
-    url = f"https://fcva.granicus.com/player/clip/{video_id}"
+    url = f"https://{GRANICUS_HOST}/player/clip/{video_id}"
     
     try:
-        response = requests.head(url, timeout=10, allow_redirects=True)
-        # Granicus typically returns 200 for valid videos, 404 for invalid
-        if response.status_code == 200:
-            return video_id, True, response.url
-        else:
-            return video_id, False, None
-    except Exception as e:
-        return video_id, False, str(e)
+        # Granicus answers a real clip with a redirect to the player and an
+        # unknown one with 404, so the first response settles it; following
+        # the redirect would only double the round-trips
+        response = await client.head(url, follow_redirects=False)
+        if _probe_cache:
+            _probe_cache.record(video_id, response.status_code)
+        return video_id, response.status_code in VALID_STATUSES
+    except Exception:
+        return video_id, False
 
-def scan_range(start_id, end_id, max_workers=10):
-    """Scan a range of video IDs concurrently"""
-    print(f"Scanning video IDs {start_id} to {end_id}...")
+async def scan_range(client, video_ids, max_workers=MAX_WORKERS):
+    """Scan a batch of video IDs concurrently"""
+    video_ids = list(video_ids)
+    print(f"Scanning {len(video_ids)} video IDs ({min(video_ids)} to {max(video_ids)})...")
     
     valid_ids = []
-    total_checked = 0
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_id = {executor.submit(check_video_exists, vid_id): vid_id 
-                       for vid_id in range(start_id, end_id + 1)}
-        
-        # Process results as they complete
-        for future in as_completed(future_to_id):
-            video_id, is_valid, info = future.result()
-            total_checked += 1
+    # The semaphore caps in-flight HEADs and the token bucket caps how fast
+    # new ones go out; HTTP/2 multiplexes them over a handful of connections
+    semaphore = asyncio.Semaphore(max_workers)
+    limiter = AsyncLimiter(REQUESTS_PER_SECOND, 1.0)
+    
+    async def bounded_check(vid_id):
+        async with semaphore:
+            # Known-missing IDs are answered from the cache without spending a token
+            if _probe_cache and _probe_cache.is_known_missing(vid_id):
+                return vid_id, False
+            async with limiter:
+                return await check_video_exists(client, vid_id)
+    
+    tasks = [bounded_check(vid_id) for vid_id in video_ids]
+    
+    # Process results as they complete; the bar only writes a line on hits
+    with tqdm(total=len(video_ids), unit='id') as pbar:
+        for task in asyncio.as_completed(tasks):
+            video_id, is_valid = await task
+            pbar.update(1)
             
             if is_valid:
-                print(f"✓ Found video {video_id}")
+                pbar.write(f"✓ Found video {video_id}")
                 valid_ids.append(video_id)
-            elif total_checked % 50 == 0:  # Progress update every 50 checks
-                print(f"  Checked {total_checked}/{end_id - start_id + 1} IDs, found {len(valid_ids)} videos")
-            
-            # Small delay to be respectful to the server
-            time.sleep(0.1)
+    
+    if _probe_cache:
+        _probe_cache.commit()
     
     return sorted(valid_ids)
 
-def smart_scan(start_id=28, initial_range=100):
+async def fetch_index_ids(client):
+    """Read every clip ID from the Granicus archive listing in one request"""
+    print(f"Checking archive index: {INDEX_URL}")
+    try:
+        response = await client.get(INDEX_URL, follow_redirects=True)
+    except httpx.HTTPError as e:
+        print(f"  Index unavailable: {e}")
+        return []
+    
+    if response.status_code != 200:
+        print(f"  Index unavailable: HTTP {response.status_code}")
+        return []
+    
+    return sorted({int(vid) for vid in CLIP_RE.findall(response.text)})
+
+async def find_upper_bound(client, last_known_valid, limit, probed=(), found=(), window=GAP_TOLERANCE):
+    """Find where the run of valid IDs ends in O(log N) probes
+
+    Valid IDs have gaps, so each probe checks a window of IDs rather than a
+    single one. Gallop forward with doubling steps until a window comes back
+    empty, then bisect between the last hit and that empty window. Returns
+    the boundary along with every ID probed and found on the way, so the
+    caller only has to backfill what was skipped. IDs already probed (and
+    found) by an earlier scan can be passed in so they aren't requested again.
+    """
+    probed = set(probed)
+    found = set(found)
+    
+    async def probe(vid_id):
+        window_ids = range(vid_id, min(vid_id + window, limit + 1))
+        new_ids = [vid for vid in window_ids if vid not in probed]
+        if new_ids:
+            probed.update(new_ids)
+            found.update(await scan_range(client, new_ids))
+        hits = [vid for vid in window_ids if vid in found]
+        return max(hits) if hits else None
+    
+    lo, hi = last_known_valid, limit + 1
+    step = 1
+    while lo + step <= limit:
+        hit = await probe(lo + step)
+        if hit is None:
+            hi = lo + step
+            break
+        lo = hit
+        step *= 2
+    
+    while hi - lo > window:
+        mid = (lo + hi) // 2
+        hit = await probe(mid)
+        if hit is None:
+            hi = mid
+        else:
+            lo = hit
+    
+    return hi - 1, probed, sorted(found)
+
+async def smart_scan(client, start_id=28, initial_range=100):
     """Smart scanning that adjusts range based on findings"""
     print(f"Starting smart scan from video ID {start_id}")
     print("=" * 60)
     
-    all_valid_ids = []
-    current_start = start_id
-    
-    # First, scan backwards from the starting point to find earlier videos
-    print(f"\n📹 Scanning backwards from {start_id}...")
     backwards_end = max(1, start_id - 200)  # Don't go below 1
-    backwards_ids = scan_range(backwards_end, start_id - 1, max_workers=5)
-    all_valid_ids.extend(backwards_ids)
-    print(f"Found {len(backwards_ids)} videos going backwards")
-    
-    # Scan the initial range forward
-    print(f"\n📹 Scanning forward from {start_id}...")
     end_id = start_id + initial_range
-    valid_ids = scan_range(start_id, end_id)
-    all_valid_ids.extend(valid_ids)
+    limit = start_id + 1000  # Limit to prevent runaway
     
-    print(f"Found {len(valid_ids)} videos in range {start_id}-{end_id}")
+    # One byte per candidate ID: O(1) marking, and counting a window of
+    # results is a C-level slice count instead of rescanning a list
+    seen = bytearray(max(limit, end_id) + 1)
     
-    # If we found videos in the last portion, extend the search
-    recent_videos = [vid for vid in valid_ids if vid > end_id - 20]
+    def mark(video_ids):
+        for vid in video_ids:
+            seen[vid] = 1
     
-    while recent_videos and end_id < start_id + 1000:  # Limit to prevent runaway
+    # The backwards range and the initial forward range don't depend on each
+    # other, so probe them together as one batch
+    print(f"\n📹 Scanning backwards and forward from {start_id}...")
+    initial_ids = list(range(backwards_end, start_id)) + list(range(start_id, end_id + 1))
+    found_ids = await scan_range(client, initial_ids)
+    mark(found_ids)
+    
+    print(f"Found {seen[backwards_end:start_id].count(1)} videos going backwards")
+    print(f"Found {seen[start_id:end_id + 1].count(1)} videos in range {start_id}-{end_id}")
+    
+    # If we found videos in the last portion, extend the search
+    recent_start = max(start_id, end_id - 19)
+    if seen[recent_start:end_id + 1].count(1):
         print(f"\n📹 Extending search (found recent videos)...")
-        new_start = end_id + 1
-        end_id = new_start + initial_range
+        last_recent = seen.rindex(1, recent_start, end_id + 1)
+        upper, probed, found = await find_upper_bound(client, last_recent, limit,
+                                                      probed=initial_ids, found=found_ids)
+        mark(found)
+        print(f"Last video is at or below ID {upper}")
         
-        new_valid_ids = scan_range(new_start, end_id)
-        all_valid_ids.extend(new_valid_ids)
+        # Backfill whatever the search skipped between the initial range and the boundary
+        backfill_ids = [vid for vid in range(end_id + 1, upper + 1) if vid not in probed]
+        if backfill_ids:
+            mark(await scan_range(client, backfill_ids))
         
-        print(f"Found {len(new_valid_ids)} videos in range {new_start}-{end_id}")
-        
-        # Check if we found videos in the recent portion of this range
-        recent_videos = [vid for vid in new_valid_ids if vid > end_id - 20]
-        
-        # Adaptive range sizing
-        if len(new_valid_ids) == 0:
-            break  # No more videos found
-        elif len(new_valid_ids) > 10:
-            initial_range = min(200, initial_range + 50)  # Increase range if finding many
-        else:
-            initial_range = max(50, initial_range - 20)   # Decrease range if finding few
+        print(f"Found {seen[end_id + 1:upper + 1].count(1)} videos in range {end_id + 1}-{upper}")
     
-    return sorted(set(all_valid_ids))
+    return [vid for vid, is_valid in enumerate(seen) if is_valid]
 
-def main():
+async def main():
+    global _probe_cache
+    
     print("FCVA Incremental Video Scanner")
     print("=" * 60)
     
-    # Start scanning
-    valid_ids = smart_scan(start_id=28)
+    # --fresh ignores cached 404s and re-probes every ID
+    fresh = '--fresh' in sys.argv[1:]
+    _probe_cache = ProbeCache(fresh=fresh)
+    if fresh:
+        print("🔄 Fresh scan: ignoring cached probe results")
+    
+    # One index request can replace the whole scan; only probe IDs one by
+    # one if the listing is unavailable or empty
+    prime_dns_cache()
+    async with create_client() as client:
+        valid_ids = await fetch_index_ids(client)
+        if valid_ids:
+            print(f"✓ Found {len(valid_ids)} videos in the archive index")
+        else:
+            valid_ids = await smart_scan(client, start_id=28)
     
     print(f"\n{'='*60}")
     print("SCAN COMPLETE")
@@ -118,8 +298,7 @@ def main():
         print(f"Sample IDs: {valid_ids[:10]}{'...' if len(valid_ids) > 10 else ''}")
         
         # Save results
-        with open('video_ids.json', 'w') as f:
-            json.dump([str(vid) for vid in valid_ids], f, indent=2)
+        save_video_ids([str(vid) for vid in valid_ids])
         
         print(f"\n✅ Saved {len(valid_ids)} video IDs to video_ids.json")
         
@@ -137,4 +316,4 @@ def main():
         return []
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -7,24 +7,82 @@ Scrapes all Granicus video IDs from the FCVA meeting page
 
 import requests
 import re
+from io import BytesIO
 from bs4 import BeautifulSoup
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import json
 import time
+import atexit
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Stops at quotes and tag brackets, since it runs over raw markup where
+# minified HTML puts one attribute's URL right against the next
+GRANICUS_URL_RE = re.compile(r'https?://[^\s"\'<>]*granicus[^\s"\'<>]*clip[^\s"\'<>]*')
+CLIP_RE = re.compile(r'/clip/(\d+)')
+
+SESSION = requests.Session()
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+})
+
+# One headless Chrome per process: launched on first use, reused by later
+# scrapes (with cookies cleared between them) and quit at interpreter exit
+_DRIVER = None
+
+def _get_driver():
+    """Return the shared Chrome driver, launching it if needed"""
+    global _DRIVER
+    if _DRIVER is None:
+        options = Options()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        _DRIVER = webdriver.Chrome(options=options)
+    else:
+        _DRIVER.delete_all_cookies()
+    return _DRIVER
+
+def _discard_driver():
+    """Quit the shared driver so the next scrape starts a fresh browser"""
+    global _DRIVER
+    if _DRIVER is not None:
+        try:
+            _DRIVER.quit()
+        except Exception:
+            pass
+        _DRIVER = None
+
+atexit.register(_discard_driver)
+
+def save_video_ids(video_ids, filename='video_ids.json'):
+    """Write video IDs as an indented JSON list, via orjson when available"""
+    if orjson:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(video_ids, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(video_ids, f, indent=2)
+
 def scrape_with_selenium():
     """Use Selenium to scrape JavaScript-rendered content"""
-    options = Options()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    
     try:
-        driver = webdriver.Chrome(options=options)
+        driver = _get_driver()
         driver.get("https://www.fcva.us/departments/board-of-supervisors/meeting-agendas-minutes-video")
         
         # Wait for page to load
@@ -32,34 +90,25 @@ def scrape_with_selenium():
         
         # Get page source after JavaScript execution
         page_source = driver.page_source
-        driver.quit()
         
         return page_source
         
     except Exception as e:
         print(f"Selenium failed: {e}")
+        _discard_driver()
         return None
 
 def scrape_fcva_videos():
     """Scrape all Granicus video IDs from FCVA meeting page"""
     url = "https://www.fcva.us/departments/board-of-supervisors/meeting-agendas-minutes-video"
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
-    
     # Try multiple methods
     page_content = None
     
     # Method 1: Direct requests
     try:
         print("Trying direct request...")
-        response = requests.get(url, headers=headers, timeout=10)
+        response = SESSION.get(url, timeout=10)
         if response.status_code == 200:
             page_content = response.content
             print("✓ Direct request successful")
@@ -84,48 +133,58 @@ def scrape_fcva_videos():
         manual_ids = input("Enter video IDs separated by spaces (or press Enter to skip): ").strip()
         if manual_ids:
             video_ids = manual_ids.split()
-            with open('video_ids.json', 'w') as f:
-                json.dump(video_ids, f, indent=2)
+            save_video_ids(video_ids)
             return video_ids
         return []
     
-    soup = BeautifulSoup(page_content, 'html.parser')
+    if isinstance(page_content, bytes):
+        page_text = page_content.decode('utf-8', errors='replace')
+    else:
+        page_text = page_content
+        page_content = page_content.encode('utf-8')
+    
+    # Stream the anchors out with lxml when available, freeing each one as
+    # it closes; otherwise fall back to a full BeautifulSoup parse
+    if etree is not None:
+        all_hrefs = []
+        for _, link in etree.iterparse(BytesIO(page_content), events=('end',), tag='a', html=True):
+            if link.get('href'):
+                all_hrefs.append(link.get('href'))
+            link.clear()
+            while link.getprevious() is not None:
+                del link.getparent()[0]
+    else:
+        soup = BeautifulSoup(page_content, 'html.parser')
+        all_hrefs = [link.get('href') for link in soup.find_all('a', href=True)]
     
     # Look for Granicus video links
     granicus_links = []
     
     # Find all links containing granicus
-    all_links = soup.find_all('a', href=True)
-    
-    for link in all_links:
-        href = link.get('href')
+    for href in all_hrefs:
         if href and ('granicus.com' in href or 'fcva.granicus.com' in href) and 'clip' in href:
             granicus_links.append(href)
     
-    # Also search in the page text for any granicus URLs
-    page_text = soup.get_text()
-    granicus_urls = re.findall(r'https?://[^\s]*granicus[^\s]*clip[^\s]*', page_text)
+    # Also search the raw page for any granicus URLs; the markup holds every
+    # text node, so there's no need to rebuild the page text from a DOM
+    granicus_urls = GRANICUS_URL_RE.findall(page_text)
     granicus_links.extend(granicus_urls)
     
-    # Extract video IDs using regex
-    video_ids = []
-    clip_pattern = r'/clip/(\d+)'
+    # Extract video IDs using regex, kept as ints so sorting needs no key
+    video_ids = set()
     
     for link in granicus_links:
-        match = re.search(clip_pattern, link)
-        if match:
-            video_ids.append(match.group(1))
+        video_ids.update(int(vid_id) for vid_id in CLIP_RE.findall(link))
     
-    # Remove duplicates and sort
-    video_ids = sorted(list(set(video_ids)), key=int)
+    # Sort, then convert to strings once for output
+    video_ids = [str(vid_id) for vid_id in sorted(video_ids)]
     
     print(f"Found {len(video_ids)} unique videos:")
     for vid_id in video_ids:
         print(f"  - Video ID: {vid_id}")
     
     # Save to file
-    with open('video_ids.json', 'w') as f:
-        json.dump(video_ids, f, indent=2)
+    save_video_ids(video_ids)
     
     print(f"\nVideo IDs saved to video_ids.json")
     return video_ids
@@ -5,11 +5,24 @@ Enhanced FCVA Video Scraper
 Uses multiple strategies to find video IDs from the FCVA website
 """
 
-import requests
+import asyncio
+import httpx
 import re
 import json
 import time
+import atexit
+import socket
+from functools import lru_cache
+from io import BytesIO
 from bs4 import BeautifulSoup
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -17,19 +30,104 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+GRANICUS_HOST = "fcva.granicus.com"
+
+# Process-wide DNS cache: every probe goes to the same Granicus host, so
+# resolve each (host, port) once and serve later TCP lookups from memory
+# instead of sending thousands of queries to the system resolver
+_system_getaddrinfo = socket.getaddrinfo
+
+@lru_cache(maxsize=32)
+def _resolve(host, port):
+    return tuple(_system_getaddrinfo(host, port, 0, socket.SOCK_STREAM))
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    if type not in (0, socket.SOCK_STREAM) or proto not in (0, socket.IPPROTO_TCP):
+        return _system_getaddrinfo(host, port, family, type, proto, flags)
+    infos = [info for info in _resolve(host, port) if family in (0, info[0])]
+    return infos or _system_getaddrinfo(host, port, family, type, proto, flags)
+
+socket.getaddrinfo = _cached_getaddrinfo
+
+def prime_dns_cache(host=GRANICUS_HOST):
+    """Resolve the Granicus host once before scanning"""
+    try:
+        _resolve(host, 443)
+    except socket.gaierror as e:
+        print(f"⚠️  Could not resolve {host}: {e}")
+
+# Video ID patterns, compiled once rather than re-parsed per link/script
+CLIP_RE = re.compile(r'/clip/(\d+)')              # also covers player/clip/<id>
+VIEW_ID_RE = re.compile(r'view_id=(\d+)')         # also covers ViewPublisher.php?view_id=<id>
+PATH_ID_RE = re.compile(r'/(\d+)')
+JSON_ID_RE = re.compile(r'"(?:clip|video|id)"\s*:\s*"?(\d+)"?')
+GRANICUS_RE = re.compile(r'granicus[^"\']*?(\d+)')
+
+# Numbers only count when they sit in an ID position, which keeps years,
+# status codes and other page noise out without a blacklist
+CONTEXT_RE = re.compile(r'(?:/clip/|clip_id=|view_id=|data-(?:video|clip|granicus)-id=["\']?)(\d{2,6})')
+
+# Concurrent HEADs when verifying candidate IDs
+MAX_WORKERS = 20
+# Granicus answers a real clip with a redirect to the player and an unknown
+# one with 404, so any of these means the clip exists
+VALID_STATUSES = {200, 301, 302, 303, 307, 308}
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+}
+
+def create_client():
+    """Build the one HTTP/2 client shared by the verification probes"""
+    limits = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+    return httpx.AsyncClient(http2=True, limits=limits, headers=HEADERS, timeout=5)
+
+# One headless Chrome per process: launched on first use, reused by later
+# scrapes (with cookies cleared between them) and quit at interpreter exit
+_DRIVER = None
+
+def _get_driver():
+    """Return the shared Chrome driver, launching it if needed"""
+    global _DRIVER
+    if _DRIVER is None:
+        options = Options()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+        _DRIVER = webdriver.Chrome(options=options)
+    else:
+        _DRIVER.delete_all_cookies()
+    return _DRIVER
+
+def _discard_driver():
+    """Quit the shared driver so the next scrape starts a fresh browser"""
+    global _DRIVER
+    if _DRIVER is not None:
+        try:
+            _DRIVER.quit()
+        except Exception:
+            pass
+        _DRIVER = None
+
+atexit.register(_discard_driver)
+
+def save_video_ids(video_ids, filename='video_ids.json'):
+    """Write video IDs as an indented JSON list, via orjson when available"""
+    if orjson:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(video_ids, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(video_ids, f, indent=2)
+
 def scrape_with_enhanced_selenium():
     """Use Selenium with enhanced strategies"""
-    options = Options()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-    
     try:
-        driver = webdriver.Chrome(options=options)
+        driver = _get_driver()
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
         print("Loading FCVA page with Selenium...")
@@ -96,8 +194,13 @@ def scrape_with_enhanced_selenium():
         # Also check network requests for any API calls
         logs = driver.get_log('performance')
         api_calls = []
+        loads = orjson.loads if orjson else json.loads
         for log in logs:
-            message = json.loads(log['message'])
+            # Nearly every entry is some other event; skip those before parsing
+            raw_message = log['message']
+            if 'Network.responseReceived' not in raw_message:
+                continue
+            message = loads(raw_message)
             if message['message']['method'] == 'Network.responseReceived':
                 url = message['message']['params']['response']['url']
                 if 'api' in url.lower() or 'granicus' in url.lower() or 'video' in url.lower():
@@ -105,110 +208,121 @@ def scrape_with_enhanced_selenium():
         
         print(f"Found {len(api_calls)} potential API calls: {api_calls[:3]}{'...' if len(api_calls) > 3 else ''}")
         
-        driver.quit()
         return page_source, api_calls
         
     except Exception as e:
         print(f"Enhanced Selenium failed: {e}")
+        _discard_driver()
         return None, []
 
+DATA_ID_ATTRS = ['data-video-id', 'data-clip-id', 'data-granicus-id']
+
+def parse_page_elements(content):
+    """Collect link hrefs, iframe srcs, script bodies and data-* video IDs
+
+    With lxml installed the page is stream-parsed: each element is inspected
+    as it closes and then freed, so the full DOM is never held in memory.
+    Otherwise falls back to BeautifulSoup.
+    """
+    if etree is not None:
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        hrefs, iframe_srcs, scripts, data_ids = [], [], [], []
+        for _, elem in etree.iterparse(BytesIO(content), events=('end',), html=True):
+            if elem.tag == 'a' and elem.get('href'):
+                hrefs.append(elem.get('href'))
+            elif elem.tag == 'iframe' and elem.get('src'):
+                iframe_srcs.append(elem.get('src'))
+            elif elem.tag == 'script' and elem.text:
+                scripts.append(elem.text)
+            data_ids.extend(elem.get(attr) for attr in DATA_ID_ATTRS)
+            
+            # Drop the finished element and any siblings already processed
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    else:
+        soup = BeautifulSoup(content, 'html.parser')
+        hrefs = [link.get('href') for link in soup.find_all('a', href=True)]
+        iframe_srcs = [iframe.get('src', '') for iframe in soup.find_all('iframe')]
+        scripts = [script.string for script in soup.find_all('script') if script.string]
+        data_ids = [elem.get(attr) for attr in DATA_ID_ATTRS for elem in soup.find_all(attrs={attr: True})]
+    
+    return hrefs, iframe_srcs, scripts, [value for value in data_ids if value]
+
 def extract_video_ids_from_content(content, api_calls):
     """Extract video IDs using multiple patterns and sources"""
     video_ids = set()
     
     if content:
-        soup = BeautifulSoup(content, 'html.parser')
+        hrefs, iframe_srcs, scripts, data_ids = parse_page_elements(content)
         
         # Strategy 1: Look for direct Granicus links
-        all_links = soup.find_all('a', href=True)
-        for link in all_links:
-            href = link.get('href')
+        for href in hrefs:
             if href and 'granicus' in href:
                 print(f"Found Granicus link: {href}")
                 # Extract ID from various Granicus URL patterns
-                patterns = [
-                    r'/clip/(\d+)',
-                    r'view_id=(\d+)',
-                    r'player/clip/(\d+)',
-                    r'ViewPublisher\.php\?view_id=(\d+)'
-                ]
-                for pattern in patterns:
-                    matches = re.findall(pattern, href)
-                    video_ids.update(matches)
+                video_ids.update(CLIP_RE.findall(href))
+                video_ids.update(VIEW_ID_RE.findall(href))
         
         # Strategy 2: Look for embedded video players or iframes
-        iframes = soup.find_all('iframe')
-        for iframe in iframes:
-            src = iframe.get('src', '')
+        for src in iframe_srcs:
             if 'granicus' in src or 'video' in src:
                 print(f"Found video iframe: {src}")
-                matches = re.findall(r'/(\d+)', src)
+                matches = PATH_ID_RE.findall(src)
                 video_ids.update(matches)
         
         # Strategy 3: Search for video IDs in JavaScript or data attributes
-        scripts = soup.find_all('script')
         for script in scripts:
-            if script.string:
-                # Look for video IDs in JSON data or JavaScript variables
-                json_matches = re.findall(r'"(?:clip|video|id)"\s*:\s*"?(\d+)"?', script.string)
-                video_ids.update(json_matches)
-                
-                # Look for Granicus URLs in JavaScript
-                granicus_matches = re.findall(r'granicus[^"\']*?(\d+)', script.string)
-                video_ids.update(granicus_matches)
+            # Look for video IDs in JSON data or JavaScript variables
+            json_matches = JSON_ID_RE.findall(script)
+            video_ids.update(json_matches)
+            
+            # Look for Granicus URLs in JavaScript
+            granicus_matches = GRANICUS_RE.findall(script)
+            video_ids.update(granicus_matches)
         
         # Strategy 4: Look for data attributes
-        elements_with_data = soup.find_all(attrs={"data-video-id": True}) + \
-                           soup.find_all(attrs={"data-clip-id": True}) + \
-                           soup.find_all(attrs={"data-granicus-id": True})
-        
-        for elem in elements_with_data:
-            for attr in ['data-video-id', 'data-clip-id', 'data-granicus-id']:
-                if elem.get(attr):
-                    video_ids.add(elem.get(attr))
-        
-        # Strategy 5: Look in the raw HTML for any number patterns near video-related keywords
-        video_keywords = ['granicus', 'video', 'clip', 'meeting', 'recording']
-        for keyword in video_keywords:
-            pattern = f'{keyword}[^\\d]*(\\d{{2,5}})'
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            video_ids.update(matches)
+        video_ids.update(data_ids)
+        
+        # Strategy 5: Look in the raw HTML for IDs in clip/view/data-* positions
+        video_ids.update(CONTEXT_RE.findall(content))
     
     # Strategy 6: Extract from API calls
     for api_url in api_calls:
-        matches = re.findall(r'(\d{2,5})', api_url)
-        video_ids.update(matches)
+        video_ids.update(CONTEXT_RE.findall(api_url))
     
-    # Filter out obviously wrong IDs (too short/long, common false positives)
-    filtered_ids = set()
-    for vid_id in video_ids:
-        if vid_id.isdigit() and 2 <= len(vid_id) <= 6:  # Reasonable length for video IDs
-            # Skip common false positives
-            if vid_id not in ['2024', '2023', '2022', '2021', '2020', '100', '200', '300', '404', '500']:
-                filtered_ids.add(vid_id)
+    # Keep reasonable-length numeric IDs (data-* attributes can hold anything)
+    filtered_ids = {vid_id for vid_id in video_ids if vid_id.isdigit() and 2 <= len(vid_id) <= 6}
     
-    return sorted(list(filtered_ids), key=int)
+    return sorted(filtered_ids, key=int)
 
-def test_video_urls(video_ids):
-    """Test if video URLs are accessible"""
-    working_ids = []
+async def test_video_urls(client, video_ids):
+    """Test if video URLs are accessible, up to MAX_WORKERS at a time"""
+    semaphore = asyncio.Semaphore(MAX_WORKERS)
     
-    print(f"Testing {len(video_ids)} video IDs...")
-    for vid_id in video_ids[:10]:  # Test first 10 to avoid overwhelming the server
-        test_url = f"https://fcva.granicus.com/player/clip/{vid_id}"
-        try:
-            response = requests.head(test_url, timeout=5)
-            if response.status_code == 200:
-                print(f"✓ Video {vid_id} is accessible")
-                working_ids.append(vid_id)
-            else:
-                print(f"✗ Video {vid_id} returned {response.status_code}")
-        except Exception as e:
-            print(f"✗ Video {vid_id} failed: {e}")
+    async def check(vid_id):
+        test_url = f"https://{GRANICUS_HOST}/player/clip/{vid_id}"
+        async with semaphore:
+            try:
+                response = await client.head(test_url, follow_redirects=False)
+            except Exception as e:
+                # Anything raised here (h2 protocol errors, ssl/OSError httpx
+                # doesn't wrap) fails this id only, not the whole gather
+                print(f"✗ Video {vid_id} failed: {e}")
+                return vid_id, False
+        if response.status_code in VALID_STATUSES:
+            print(f"✓ Video {vid_id} is accessible")
+            return vid_id, True
+        print(f"✗ Video {vid_id} returned {response.status_code}")
+        return vid_id, False
     
-    return working_ids
+    print(f"Testing {len(video_ids)} video IDs...")
+    prime_dns_cache()
+    results = await asyncio.gather(*(check(vid_id) for vid_id in video_ids))
+    return [vid_id for vid_id, ok in results if ok]
 
-def main():
+async def main():
     print("Enhanced FCVA Video Scraper Starting...")
     print("=" * 60)
     
@@ -225,16 +339,16 @@ def main():
     print(f"\nFound {len(video_ids)} potential video IDs: {video_ids}")
     
     if video_ids:
-        # Test a few URLs to verify they work
-        working_ids = test_video_urls(video_ids)
+        # Verify every candidate URL
+        async with create_client() as client:
+            working_ids = await test_video_urls(client, video_ids)
         
         if working_ids:
             print(f"\nConfirmed {len(working_ids)} working video IDs")
             video_ids = working_ids
         
         # Save results
-        with open('video_ids.json', 'w') as f:
-            json.dump(video_ids, f, indent=2)
+        save_video_ids(video_ids)
         
         print(f"\nSaved {len(video_ids)} video IDs to video_ids.json")
         return video_ids
@@ -244,7 +358,7 @@ def main():
         return []
 
 if __name__ == "__main__":
-    video_ids = main()
+    video_ids = asyncio.run(main())
     
     if video_ids:
         print(f"\n{'='*60}")
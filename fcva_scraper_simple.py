@@ -6,20 +6,41 @@ Simple FCVA Video Scraper - No Selenium required
 import requests
 import re
 import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Granicus clip URL formats, compiled once
+CLIP_PATTERNS = [re.compile(p) for p in (
+    r'fcva\.granicus\.com/player/clip/(\d+)',
+    r'granicus\.com/player/clip/(\d+)',
+    r'/clip/(\d+)',
+)]
+
+SESSION = requests.Session()
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+})
+
+def save_video_ids(video_ids, filename='video_ids.json'):
+    """Write video IDs as an indented JSON list, via orjson when available"""
+    if orjson:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(video_ids, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(video_ids, f, indent=2)
 
 def scrape_fcva_videos():
     url = "https://www.fcva.us/departments/board-of-supervisors/meeting-agendas-minutes-video"
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
-    }
-    
     try:
         print("Fetching FCVA meeting page...")
-        response = requests.get(url, headers=headers, timeout=10)
+        response = SESSION.get(url, timeout=10)
         print(f"Response status: {response.status_code}")
         
         if response.status_code == 403:
@@ -38,8 +59,7 @@ def scrape_fcva_videos():
                 except ValueError:
                     pass  # Keep as strings if not all numeric
                 
-                with open('video_ids.json', 'w') as f:
-                    json.dump(video_ids, f, indent=2)
+                save_video_ids(video_ids)
                 
                 print(f"\nSaved {len(video_ids)} video IDs to video_ids.json")
                 return video_ids
@@ -49,24 +69,15 @@ def scrape_fcva_videos():
         content = response.text
         
         # Look for Granicus clip URLs in various formats
-        patterns = [
-            r'fcva\.granicus\.com/player/clip/(\d+)',
-            r'granicus\.com/player/clip/(\d+)',
-            r'/clip/(\d+)',
-        ]
-        
         video_ids = set()
-        for pattern in patterns:
-            matches = re.findall(pattern, content)
-            video_ids.update(matches)
+        for pattern in CLIP_PATTERNS:
+            video_ids.update(int(x) for x in pattern.findall(content))
         
-        video_ids = sorted([int(x) for x in video_ids])
-        video_ids = [str(x) for x in video_ids]
+        video_ids = [str(x) for x in sorted(video_ids)]
         
         print(f"Found {len(video_ids)} video IDs: {video_ids}")
         
-        with open('video_ids.json', 'w') as f:
-            json.dump(video_ids, f, indent=2)
+        save_video_ids(video_ids)
         
         return video_ids
         
@@ -8,10 +8,306 @@ Downloads and transcribes videos with proper folder organization
 import sys
 import subprocess
 import os
+import shutil
 import json
 import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from datetime import datetime
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadError
+from tqdm import tqdm
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ctranslate2
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+except ImportError:
+    WhisperModel = None
+try:
+    import torch
+    import whisper
+    from whisper.utils import get_writer
+except ImportError:
+    whisper = None
+
+# Downloads are network-bound and transcription is CPU/GPU-bound, so they
+# run in separate worker threads and overlap instead of alternating
+DOWNLOAD_WORKERS = 4
+TRANSCRIBE_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+READY_QUEUE_SIZE = 2  # Downloaded files allowed to wait for whisper; bounds disk use
+SAVE_EVERY = 10  # Flush progress after this many finished videos
+BATCH_SIZE = 16  # Audio chunks per faster-whisper forward pass (--batch-size)
+# Meetings open and close with long silences and pause for recesses; VAD
+# drops silences of at least this length instead of decoding them
+VAD_PARAMETERS = dict(min_silence_duration_ms=500)
+CONCURRENT_FRAGMENTS = 8  # HLS/DASH fragments yt-dlp fetches in parallel per clip
+LOG_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"  # Per-clip log lines only need whole seconds
+
+YDL_OPTIONS = {
+    "quiet": True,
+    "noprogress": True,
+    # Whisper only needs 16 kHz mono audio, so skip the video stream where the
+    # server offers one and hand whisper a WAV it doesn't have to resample
+    "format": "bestaudio/best",
+    "postprocessors": [{"key": "FFmpegExtractAudio", "preferredcodec": "wav"}],
+    "postprocessor_args": {"extractaudio": ["-ac", "1", "-ar", "16000"]},
+    "concurrent_fragment_downloads": CONCURRENT_FRAGMENTS,
+    "retries": 10,
+    "fragment_retries": 10,
+    "writeinfojson": True,
+}
+
+# aria2c splits each fragment over several connections when it's installed
+if shutil.which("aria2c"):
+    YDL_OPTIONS["external_downloader"] = {"default": "aria2c"}
+    YDL_OPTIONS["external_downloader_args"] = {"aria2c": ["-x", "8", "-s", "8", "-k", "1M"]}
+
+# yt-dlp runs in-process so each clip skips an interpreter start and reuses
+# warm connections; YoutubeDL isn't thread-safe, so each download thread
+# keeps its own instance for the whole run
+_ydl_local = threading.local()
+
+class FileLogger:
+    """yt-dlp logger that appends its messages to the calling thread's clip log"""
+    def debug(self, message):
+        # Set by download_video around each clip, like the progress bar
+        log_file = getattr(_ydl_local, 'log_file', None)
+        if log_file is not None:
+            log_file.write(message + "\n")
+    
+    info = warning = error = debug
+
+def show_progress(status):
+    """yt-dlp progress hook that advances the calling thread's tqdm bar"""
+    # yt-dlp hands over byte counts directly, so there's no progress text to parse
+    bar = getattr(_ydl_local, 'bar', None)
+    if bar is None or status['status'] != 'downloading':
+        return
+    
+    total = status.get('total_bytes') or status.get('total_bytes_estimate')
+    if total:
+        bar.total = total
+    bar.update(status.get('downloaded_bytes', 0) - bar.n)
+
+def get_downloader():
+    """Return this thread's YoutubeDL instance, creating it on first use"""
+    ydl = getattr(_ydl_local, 'ydl', None)
+    if ydl is None:
+        # YoutubeDL keeps the dict it's given as its params, so each instance
+        # gets its own copy (and its own outtmpl) to retarget per clip
+        ydl = _ydl_local.ydl = YoutubeDL({**YDL_OPTIONS, 'outtmpl': {}, 'logger': FileLogger()})
+        ydl.add_progress_hook(show_progress)
+    return ydl
+
+WHISPER_MODEL = "base"
+
+def pop_option(name, default=None):
+    """Remove `name value` from sys.argv and return the value"""
+    if name not in sys.argv:
+        return default
+    
+    index = sys.argv.index(name)
+    if index + 1 >= len(sys.argv):
+        print(f"Usage: python granicus_transcribe_organized.py {name} <value> ...")
+        sys.exit(1)
+    value = sys.argv[index + 1]
+    del sys.argv[index:index + 2]
+    return value
+
+def format_timestamp(seconds, separator='.'):
+    """Format seconds as HH:MM:SS.mmm (use ',' as the separator for SRT)"""
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+def write_segments(segments, vtt_path, srt_path, txt_path):
+    """Stream segments into VTT, SRT and TXT files as they are decoded"""
+    # Written under .part names and moved into place at the end, so an
+    # interrupted run never leaves a VTT that looks finished
+    paths = [str(vtt_path), str(srt_path), str(txt_path)]
+    parts = [path + ".part" for path in paths]
+    
+    with open(parts[0], 'w', encoding='utf-8') as vtt, \
+         open(parts[1], 'w', encoding='utf-8') as srt, \
+         open(parts[2], 'w', encoding='utf-8') as txt:
+        vtt.write("WEBVTT\n\n")
+        for i, segment in enumerate(segments, 1):
+            text = segment.text.strip()
+            vtt.write(f"{format_timestamp(segment.start)} --> {format_timestamp(segment.end)}\n{text}\n\n")
+            srt.write(f"{i}\n{format_timestamp(segment.start, ',')} --> {format_timestamp(segment.end, ',')}\n{text}\n\n")
+            txt.write(f"{text}\n")
+    
+    for part, path in zip(parts, paths):
+        os.replace(part, path)
+
+class WhisperEngine:
+    """Transcription model shared by every clip in a run, loaded on first use"""
+    def __init__(self, model_name=WHISPER_MODEL, compute_type=None, batch_size=BATCH_SIZE, compile_decoder=False):
+        self.model_name = model_name
+        self.compute_type = compute_type  # None picks int8_float16 on CUDA, int8 on CPU
+        self.batch_size = batch_size
+        self.compile_decoder = compile_decoder
+        self.model = None
+        self.vad = None  # Silero VAD for the openai-whisper backend, when available
+        self.backend = None
+        self._load_lock = threading.Lock()
+        # faster-whisper models are safe to call from several threads;
+        # openai-whisper hooks the model during each transcribe call
+        self._model_lock = threading.Lock()
+    
+    def load(self):
+        """Load the model once; the first transcription thread to get here pays for it"""
+        with self._load_lock:
+            if self.backend is None:
+                self.backend = self._load_backend()
+        return self.backend
+    
+    def _load_backend(self):
+        if WhisperModel is not None:
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+            compute_type = self.compute_type or ("int8_float16" if device == "cuda" else "int8")
+            print(f"🧠 Loading faster-whisper model '{self.model_name}' ({device}, {compute_type})...")
+            self.model = WhisperModel(self.model_name, device=device, compute_type=compute_type,
+                                      num_workers=TRANSCRIBE_WORKERS)
+            
+            # Batching amortizes each weight load across several VAD chunks
+            if self.batch_size > 1:
+                print(f"🧠 Batching {self.batch_size} chunks per forward pass")
+                self.model = BatchedInferencePipeline(model=self.model)
+            return "faster-whisper"
+        
+        if whisper is not None:
+            print(f"🧠 Loading whisper model '{self.model_name}'...")
+            self.model = whisper.load_model(self.model_name)
+            
+            # tiny/base decode steps are dozens of small kernels, so launch
+            # overhead dominates; CUDA graphs replay each step as one launch
+            if self.compile_decoder and self.model.device.type == "cuda":
+                print("🧠 Compiling whisper decoder (mode=reduce-overhead)...")
+                self.model.decoder = torch.compile(self.model.decoder, mode="reduce-overhead")
+                # Warm up on 30 s of silence so the first real clip doesn't pay for tracing
+                self.model.transcribe(torch.zeros(whisper.audio.N_SAMPLES, device=self.model.device), verbose=False)
+            elif self.compile_decoder:
+                print("⚠️  --compile needs CUDA, running the decoder uncompiled")
+            
+            # faster-whisper has VAD built in; openai-whisper gets it from Silero
+            try:
+                self.vad = torch.hub.load('snakers4/silero-vad', 'silero_vad', verbose=False)
+            except Exception as e:
+                print(f"⚠️  Silero VAD unavailable, transcribing silence too: {e}")
+            return "whisper"
+        
+        print("⚠️  No whisper package importable, using the whisper CLI")
+        return "cli"
+    
+    def transcribe(self, video_file, vtt_path, srt_path, txt_path):
+        """Write VTT/SRT/TXT transcripts for one file; False means only the CLI is available"""
+        backend = self.load()
+        if backend == "faster-whisper":
+            if self.batch_size > 1:
+                segments, info = self.model.transcribe(video_file, beam_size=1, batch_size=self.batch_size,
+                                                       vad_parameters=VAD_PARAMETERS)
+            else:
+                segments, info = self.model.transcribe(video_file, beam_size=1, vad_filter=True,
+                                                       vad_parameters=VAD_PARAMETERS)
+            write_segments(segments, vtt_path, srt_path, txt_path)
+        elif backend == "whisper":
+            # Decode outside the lock, then hand transcribe a tensor on the
+            # model's device so the STFT and mel filterbank run there too
+            audio = whisper.load_audio(video_file)
+            with self._model_lock:
+                audio = torch.from_numpy(audio)
+                
+                # Decode only the speech windows; clip_timestamps keeps the
+                # segment times relative to the whole recording
+                clip_timestamps = "0"
+                if self.vad is not None:
+                    vad_model, (get_speech_timestamps, *_) = self.vad
+                    speech = get_speech_timestamps(audio, vad_model, sampling_rate=whisper.audio.SAMPLE_RATE,
+                                                   **VAD_PARAMETERS)
+                    if speech:
+                        clip_timestamps = [t / whisper.audio.SAMPLE_RATE for s in speech for t in (s['start'], s['end'])]
+                
+                audio = audio.to(self.model.device)
+                # FP16 on CUDA; asking for it on CPU only triggers a warning and an FP32 fallback
+                result = self.model.transcribe(audio, verbose=False, fp16=self.model.device.type == "cuda",
+                                               clip_timestamps=clip_timestamps)
+            
+            # Writers name their output after the stem of the path they're given
+            for fmt, path in (("vtt", vtt_path), ("srt", srt_path), ("txt", txt_path)):
+                get_writer(fmt, os.path.dirname(str(path)) or ".")(result, str(path))
+        else:
+            return False
+        return True
+
+# Set in each --workers process by init_worker
+_worker_engine = None
+
+def init_worker(device_ids, model_name, compute_type, batch_size, compile_decoder):
+    """Pin this worker process to one GPU and give it its own engine"""
+    global _worker_engine
+    # CUDA reads this when it first initializes, which the lazy engine delays
+    # until the first clip, so it still takes effect after the imports
+    os.environ["CUDA_VISIBLE_DEVICES"] = str(device_ids.get())
+    _worker_engine = WhisperEngine(model_name, compute_type, batch_size, compile_decoder)
+
+def transcribe_in_worker(video_file, vtt_path, srt_path, txt_path):
+    """Transcribe one file with this worker process's engine"""
+    return _worker_engine.transcribe(video_file, vtt_path, srt_path, txt_path)
+
+class WhisperPool:
+    """WhisperEngine stand-in that shards clips across one process per device"""
+    def __init__(self, processes, model_name=WHISPER_MODEL, compute_type=None, batch_size=BATCH_SIZE,
+                 compile_decoder=False):
+        self.model_name = model_name
+        self.processes = processes
+        self.engine_args = (model_name, compute_type, batch_size, compile_decoder)
+        self._pool_lock = threading.Lock()
+        self.pool = self._start_pool()
+    
+    def _start_pool(self):
+        # Spawned, not forked: a fork taken while download threads hold locks
+        # can leave the child waiting on a lock nobody will release
+        context = multiprocessing.get_context("spawn")
+        device_ids = context.Queue()
+        for device_id in range(self.processes):
+            device_ids.put(device_id)
+        return ProcessPoolExecutor(max_workers=self.processes, mp_context=context, initializer=init_worker,
+                                   initargs=(device_ids,) + self.engine_args)
+    
+    def transcribe(self, video_file, vtt_path, srt_path, txt_path):
+        """Transcribe one file in whichever worker process is free"""
+        pool = self.pool
+        try:
+            return pool.submit(transcribe_in_worker, video_file, vtt_path, srt_path, txt_path).result()
+        except BrokenProcessPool:
+            # A worker died (CUDA OOM kill, segfault in the model): every clip
+            # in flight fails, and later clips get a fresh set of workers
+            with self._pool_lock:
+                if self.pool is pool:
+                    pool.shutdown(wait=False)
+                    self.pool = self._start_pool()
+            raise
+    
+    def close(self):
+        """Let the worker processes finish and exit"""
+        self.pool.shutdown()
+
+def run_logged(cmd, log_path):
+    """Run a command with its combined output going straight to a log file"""
+    # The child writes to the file descriptor itself, so none of whisper's
+    # per-segment output is copied or decoded in Python
+    with open(log_path, 'ab') as log_file:
+        subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT, check=True)
 
 def setup_directories():
     """Create organized directory structure"""
@@ -23,9 +319,9 @@ def setup_directories():
         'metadata': base_dir / "metadata"
     }
     
-    for name, path in directories.items():
+    for path in directories.values():
         path.mkdir(parents=True, exist_ok=True)
-        print(f"📁 Created directory: {path}")
+    print(f"📁 Created {len(directories)} directories under {base_dir}")
     
     return directories
 
@@ -36,43 +332,47 @@ def download_video(clip_id, dirs):
     output_pattern = str(video_dir / f"video_{clip_id}.%(ext)s")
     
     print(f"📥 Downloading video {clip_id}...")
-    cmd = ["yt-dlp", url, "-o", output_pattern, "--write-info-json"]
+    ydl = get_downloader()
+    ydl.params['outtmpl']['default'] = output_pattern  # This thread's own params copy
     
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        with open(dirs['logs'] / f"video_{clip_id}_download.log", 'a') as log_file, \
+             tqdm(desc=f"video {clip_id}", unit='B', unit_scale=True, leave=False) as bar:
+            _ydl_local.log_file = log_file
+            _ydl_local.bar = bar
+            try:
+                info = ydl.extract_info(url, download=True)
+            finally:
+                _ydl_local.log_file = None
+                _ydl_local.bar = None
         print(f"✓ Downloaded video {clip_id}")
         
-        # Find the actual downloaded files
-        video_files = list(video_dir.glob(f"video_{clip_id}.*"))
-        video_file = None
-        info_file = None
-        
-        for file in video_files:
-            if file.suffix == '.json':
-                info_file = file
-            elif file.suffix in ['.mp4', '.mkv', '.webm', '.avi']:
-                video_file = file
+        # yt-dlp reports the final path after audio extraction, so there's
+        # no directory to search or extension to guess
+        downloads = info.get('requested_downloads')
+        video_file = downloads[0]['filepath'] if downloads else None
+        info_file = video_dir / f"video_{clip_id}.info.json"
         
         # Save download metadata
-        if info_file and dirs['metadata']:
+        if dirs['metadata']:
             metadata_file = dirs['metadata'] / f"video_{clip_id}_info.json"
             if info_file.exists() and not metadata_file.exists():
                 info_file.rename(metadata_file)
         
-        return str(video_file) if video_file else None
+        return video_file
         
-    except subprocess.CalledProcessError as e:
+    except DownloadError as e:
         error_msg = f"Failed to download video {clip_id}: {e}"
         print(f"✗ {error_msg}")
         
         # Log the error
         error_log = dirs['logs'] / "download_errors.log"
         with open(error_log, 'a') as f:
-            f.write(f"{datetime.now().isoformat()}: {error_msg}\n")
+            f.write(f"{time.strftime(LOG_TIME_FORMAT)}: {error_msg}\n")
         
         return None
 
-def transcribe_video(video_file, clip_id, dirs):
+def transcribe_video(video_file, clip_id, dirs, existing, engine):
     """Transcribe video using whisper with timestamps"""
     if not os.path.exists(video_file):
         print(f"Video file {video_file} not found")
@@ -87,44 +387,55 @@ def transcribe_video(video_file, clip_id, dirs):
         'txt': transcript_dir / f"video_{clip_id}.txt"    # Plain text
     }
     
-    # Skip if transcript already exists
-    if outputs['vtt'].exists():
+    # Skip if transcript already exists (existing is one scandir taken at startup)
+    if outputs['vtt'].name in existing:
         print(f"✓ Transcript already exists: {outputs['vtt']}")
         return str(outputs['vtt'])
     
     print(f"🎯 Transcribing video {clip_id}...")
     start_time = time.time()
     
-    # Use OpenAI Whisper with multiple formats including timestamps
+    try:
+        transcribed = engine.transcribe(video_file, outputs['vtt'], outputs['srt'], outputs['txt'])
+    except Exception as e:
+        error_msg = f"Failed to transcribe video {clip_id}: {e}"
+        print(f"✗ {error_msg}")
+        error_log = dirs['logs'] / "transcription_errors.log"
+        with open(error_log, 'a') as f:
+            f.write(f"{time.strftime(LOG_TIME_FORMAT)}: {error_msg}\n")
+        return None
+    
+    if transcribed:
+        elapsed = time.time() - start_time
+        print(f"✓ Transcribed video {clip_id} in {elapsed:.1f}s")
+        for file in outputs.values():
+            print(f"  📄 Created: {file.name}")
+        
+        success_log = dirs['logs'] / "transcription_success.log"
+        with open(success_log, 'a') as f:
+            f.write(f"{time.strftime(LOG_TIME_FORMAT)}: Video {clip_id} transcribed successfully\n")
+        
+        existing.update(file.name for file in outputs.values())
+        return str(outputs['vtt'])
+    
+    # Without any whisper package, fall back to the CLI with multiple formats
     whisper_commands = [
         # Try with multiple output formats
-        ["whisper", video_file, "--model", "base", "--output_format", "vtt", "--output_format", "srt", "--output_format", "txt", "--output_dir", str(transcript_dir), "--verbose", "False"],
+        ["whisper", video_file, "--model", engine.model_name, "--output_format", "vtt", "--output_format", "srt", "--output_format", "txt", "--output_dir", str(transcript_dir), "--verbose", "False"],
         # Fallback to just VTT
-        ["whisper", video_file, "--model", "base", "--output_format", "vtt", "--output_dir", str(transcript_dir), "--verbose", "False"],
+        ["whisper", video_file, "--model", engine.model_name, "--output_format", "vtt", "--output_dir", str(transcript_dir), "--verbose", "False"],
         # Python module fallback
-        [sys.executable, "-m", "whisper", video_file, "--model", "base", "--output_format", "vtt", "--output_dir", str(transcript_dir)]
+        [sys.executable, "-m", "whisper", video_file, "--model", engine.model_name, "--output_format", "vtt", "--output_dir", str(transcript_dir)]
     ]
     
     for i, cmd in enumerate(whisper_commands):
         try:
             print(f"  🔄 Trying transcription method {i+1}/{len(whisper_commands)}")
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-            
-            # Whisper creates files with original filename base
-            video_base = Path(video_file).stem
-            
-            # Map generated files to our organized naming
-            generated_files = {
-                transcript_dir / f"{video_base}.vtt": outputs['vtt'],
-                transcript_dir / f"{video_base}.srt": outputs['srt'],
-                transcript_dir / f"{video_base}.txt": outputs['txt']
-            }
+            run_logged(cmd, dirs['logs'] / f"video_{clip_id}_transcription.log")
             
-            files_created = []
-            for generated, target in generated_files.items():
-                if generated.exists() and not target.exists():
-                    generated.rename(target)
-                    files_created.append(target)
+            # Whisper names its output after the input's stem, and video_<id>
+            # is already the transcript naming, so the files land in place
+            files_created = [file for file in outputs.values() if file.exists()]
             
             elapsed = time.time() - start_time
             print(f"✓ Transcribed video {clip_id} in {elapsed:.1f}s")
@@ -134,9 +445,10 @@ def transcribe_video(video_file, clip_id, dirs):
             # Log successful transcription
             success_log = dirs['logs'] / "transcription_success.log"
             with open(success_log, 'a') as f:
-                f.write(f"{datetime.now().isoformat()}: Video {clip_id} transcribed successfully\n")
+                f.write(f"{time.strftime(LOG_TIME_FORMAT)}: Video {clip_id} transcribed successfully\n")
             
-            return str(outputs['vtt']) if outputs['vtt'].exists() else str(files_created[0])
+            existing.update(file.name for file in files_created)
+            return str(outputs['vtt']) if outputs['vtt'].name in existing else str(files_created[0])
             
         except (subprocess.CalledProcessError, FileNotFoundError) as e:
             print(f"  ✗ Method {i+1} failed: {e}")
@@ -148,15 +460,78 @@ def transcribe_video(video_file, clip_id, dirs):
     # Log transcription error
     error_log = dirs['logs'] / "transcription_errors.log"
     with open(error_log, 'a') as f:
-        f.write(f"{datetime.now().isoformat()}: {error_msg}\n")
+        f.write(f"{time.strftime(LOG_TIME_FORMAT)}: {error_msg}\n")
     
     return None
 
+def download_worker(ids_in, paths_out, results, dirs):
+    """Download clips until ids_in runs dry, queueing each file for transcription"""
+    while True:
+        try:
+            clip_id = ids_in.get_nowait()
+        except queue.Empty:
+            return
+        
+        try:
+            video_file = download_video(clip_id, dirs)
+        except Exception as e:
+            print(f"❌ Unexpected error for video {clip_id}: {e}")
+            video_file = None
+        
+        if video_file:
+            paths_out.put((clip_id, video_file))  # Blocks while whisper is behind
+        else:
+            results.put((clip_id, False))
+
+def transcribe_worker(paths_out, results, dirs, existing, engine):
+    """Transcribe queued files until the None sentinel arrives"""
+    while True:
+        item = paths_out.get()
+        if item is None:
+            return
+        
+        clip_id, video_file = item
+        try:
+            transcript_file = transcribe_video(video_file, clip_id, dirs, existing, engine)
+        except Exception as e:
+            print(f"❌ Unexpected error for video {clip_id}: {e}")
+            transcript_file = None
+        
+        if transcript_file:
+            print(f"✅ Process complete for video {clip_id}")
+            print(f"  🎥 Video: {Path(video_file).name}")
+            print(f"  📄 Transcript: {Path(transcript_file).name}")
+            
+            # Delete audio file after successful transcription to save space
+            try:
+                os.remove(video_file)
+                print(f"  🗑️  Deleted audio file to save space")
+            except Exception as e:
+                print(f"  ⚠️  Could not delete audio file: {e}")
+        else:
+            print(f"❌ Transcription failed for video {clip_id}")
+        results.put((clip_id, bool(transcript_file)))
+
+def read_json(path):
+    """Parse a JSON file, with orjson when it's installed"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def write_json(path, data):
+    """Write indented JSON in a single write, with orjson when it's installed"""
+    # orjson serializes the id lists several times faster than the json module
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2).encode()
+    with open(path, 'wb') as f:
+        f.write(payload)
+
 def load_video_ids_from_file(filename):
     """Load video IDs from JSON file"""
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
+        data = read_json(filename)
         if isinstance(data, list):
             return [str(x) for x in data]
         else:
@@ -179,15 +554,13 @@ def save_progress(completed_ids, failed_ids, dirs):
     }
     
     progress_file = dirs['logs'] / 'transcription_progress.json'
-    with open(progress_file, 'w') as f:
-        json.dump(progress, f, indent=2)
+    write_json(progress_file, progress)
 
 def load_progress(dirs):
     """Load previous progress"""
     progress_file = dirs['logs'] / 'transcription_progress.json'
     try:
-        with open(progress_file, 'r') as f:
-            return json.load(f)
+        return read_json(progress_file)
     except FileNotFoundError:
         return {"completed": [], "failed": []}
 
@@ -219,14 +592,22 @@ def create_summary_report(dirs, completed_ids, failed_ids):
         f.write(f"## File Organization\n")
         f.write(f"```\n")
         f.write(f"fcva_videos/\n")
-        f.write(f"├── videos/          # Temporary video downloads (deleted after transcription)\n")
+        f.write(f"├── videos/          # Temporary audio downloads (deleted after transcription)\n")
         f.write(f"├── transcripts/     # VTT, SRT, and TXT transcripts (kept)\n")
         f.write(f"├── metadata/        # Video metadata from yt-dlp (kept)\n")
         f.write(f"└── logs/           # Process logs and reports (kept)\n")
         f.write(f"```\n")
-        f.write(f"\n**Note**: Video files are automatically deleted after successful transcription to save disk space and keep the repository lightweight for Git.\n")
+        f.write(f"\n**Note**: Downloaded audio files are automatically deleted after successful transcription to save disk space and keep the repository lightweight for Git.\n")
 
 def main():
+    model_name = pop_option('--model', WHISPER_MODEL)
+    compute_type = pop_option('--compute-type')
+    processes = int(pop_option('--workers', 0))
+    batch_size = int(pop_option('--batch-size', BATCH_SIZE))
+    compile_decoder = '--compile' in sys.argv
+    if compile_decoder:
+        sys.argv.remove('--compile')
+    
     print("🎬 FCVA Organized Video Transcription Pipeline")
     print("=" * 60)
     
@@ -238,6 +619,12 @@ def main():
         print("  python granicus_transcribe_organized.py <clip_id> [clip_id2] ...")
         print("  python granicus_transcribe_organized.py --from-file video_ids.json")
         print("  python granicus_transcribe_organized.py --resume")
+        print("Options:")
+        print(f"  --model NAME    whisper model size (default {WHISPER_MODEL})")
+        print("  --compute-type T  faster-whisper compute type, e.g. int8, int8_float16, float16 (default: by device)")
+        print(f"  --batch-size N  faster-whisper chunks per forward pass (default {BATCH_SIZE}, 1 disables batching)")
+        print("  --workers N     transcribe in N processes, one per GPU (CUDA_VISIBLE_DEVICES=0..N-1)")
+        print("  --compile       torch.compile the openai-whisper decoder with CUDA graphs")
         sys.exit(1)
     
     # Parse arguments
@@ -261,54 +648,55 @@ def main():
     
     print(f"\n📋 Processing {len(clip_ids)} videos")
     print(f"🎯 First few: {clip_ids[:5]}{'...' if len(clip_ids) > 5 else ''}")
+    if processes:
+        # Each process holds its own model, so one feeder thread per process
+        engine = WhisperPool(processes, model_name, compute_type, batch_size, compile_decoder)
+        transcribe_threads = processes
+    else:
+        engine = WhisperEngine(model_name, compute_type, batch_size, compile_decoder)
+        transcribe_threads = TRANSCRIBE_WORKERS
+    
+    # One directory read up front instead of a stat per clip
+    existing = {entry.name for entry in os.scandir(dirs['transcripts'])}
+    
+    ids_in = queue.Queue()
+    for clip_id in clip_ids:
+        ids_in.put(clip_id)
+    paths_out = queue.Queue(maxsize=READY_QUEUE_SIZE)
+    results = queue.Queue()
+    
+    # While one clip is transcribing, the download workers are already
+    # fetching the next ones; only main() touches the result lists
+    workers = [threading.Thread(target=download_worker, args=(ids_in, paths_out, results, dirs), daemon=True)
+               for _ in range(DOWNLOAD_WORKERS)]
+    workers += [threading.Thread(target=transcribe_worker, args=(paths_out, results, dirs, existing, engine), daemon=True)
+                for _ in range(transcribe_threads)]
+    for worker in workers:
+        worker.start()
     
     completed_ids = []
     failed_ids = []
     
-    for i, clip_id in enumerate(clip_ids, 1):
-        print(f"\n{'='*60}")
-        print(f"🎬 Processing video {clip_id} ({i}/{len(clip_ids)})")
-        print(f"{'='*60}")
-        
-        try:
-            # Download video
-            video_file = download_video(clip_id, dirs)
-            if not video_file:
-                failed_ids.append(clip_id)
-                continue
-                
-            # Transcribe video
-            transcript_file = transcribe_video(video_file, clip_id, dirs)
-            if transcript_file:
-                print(f"✅ Process complete for video {clip_id}")
-                print(f"  🎥 Video: {Path(video_file).name}")
-                print(f"  📄 Transcript: {Path(transcript_file).name}")
-                
-                # Delete video file after successful transcription to save space
-                try:
-                    os.remove(video_file)
-                    print(f"  🗑️  Deleted video file to save space")
-                except Exception as e:
-                    print(f"  ⚠️  Could not delete video file: {e}")
-                
-                completed_ids.append(clip_id)
-            else:
-                print(f"❌ Transcription failed for video {clip_id}")
-                failed_ids.append(clip_id)
-                
-        except KeyboardInterrupt:
-            print("\n\n⚠️ Interrupted by user")
-            save_progress(completed_ids, failed_ids, dirs)
-            create_summary_report(dirs, completed_ids, failed_ids)
-            print(f"📊 Progress saved. Resume with: python granicus_transcribe_organized.py --resume")
-            sys.exit(1)
-        except Exception as e:
-            print(f"❌ Unexpected error for video {clip_id}: {e}")
-            failed_ids.append(clip_id)
-        
-        # Save progress every 10 videos
-        if (i % 10) == 0:
-            save_progress(completed_ids, failed_ids, dirs)
+    try:
+        for finished in range(1, len(clip_ids) + 1):
+            clip_id, ok = results.get()
+            (completed_ids if ok else failed_ids).append(clip_id)
+            if finished % SAVE_EVERY == 0:
+                save_progress(completed_ids, failed_ids, dirs)
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Interrupted by user")
+        save_progress(completed_ids, failed_ids, dirs)
+        create_summary_report(dirs, completed_ids, failed_ids)
+        print(f"📊 Progress saved. Resume with: python granicus_transcribe_organized.py --resume")
+        sys.exit(1)
+    
+    # Every clip is accounted for, so release the idle transcription workers
+    for _ in range(transcribe_threads):
+        paths_out.put(None)
+    for worker in workers:
+        worker.join()
+    if processes:
+        engine.close()
     
     # Final summary
     print(f"\n{'='*60}")
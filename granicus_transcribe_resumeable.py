@@ -11,8 +11,61 @@ import os
 import json
 import time
 import signal
+import tempfile
+import atexit
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ctranslate2
+    import numpy as np
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+except ImportError:
+    WhisperModel = None
+try:
+    import numpy as np
+    import torch
+    import whisper
+    from whisper.utils import get_writer
+except ImportError:
+    whisper = None
+
+DOWNLOAD_WORKERS = 3  # Videos downloaded in parallel (--downloads)
+TRANSCRIBE_WORKERS = max(1, (os.cpu_count() or 1) // 4)  # Videos transcribed at once on CPU
+CONCURRENT_FRAGMENTS = 8  # HLS/DASH fragments yt-dlp fetches in parallel per video
+READY_QUEUE_SIZE = 2  # Downloaded videos allowed to wait for whisper; bounds disk use
+# When streaming, every video in flight (downloads + READY_QUEUE_SIZE +
+# transcription workers) holds its audio in memory as int16 PCM, about
+# 115 MB per hour of meeting, plus a float32 copy (twice that) while it is
+# transcribed; a 4-hour meeting is ~460 MB queued and ~1.4 GB transcribing
+WHISPER_MODEL = "base"
+BATCH_SIZE = 16  # Audio chunks per faster-whisper forward pass (--batch-size)
+VIDEO_EXTENSIONS = {"mp4", "mkv", "webm", "avi"}
+FULL_SAVE_EVERY = 50  # Progress events logged to progress.ndjson between full rewrites
+# Meetings open and close with long silences and pause for recesses; Silero
+# VAD drops silences of at least this length instead of decoding them
+VAD_PARAMETERS = dict(min_silence_duration_ms=500)
+# Text whisper invents over silence and applause, compared lowercased
+# without punctuation; only dropped when the decoder itself doubts there was
+# speech, since "Thank you." and "Aye." are also real meeting speech
+HALLUCINATIONS = {"thank you", "thanks for watching", "thank you for watching",
+                  "please subscribe", "subtitles by the amaraorg community", "you"}
+NO_SPEECH_THRESHOLD = 0.6  # whisper's own defaults for treating a window as silence
+LOGPROB_THRESHOLD = -1.0
+REPEAT_RUN_LIMIT = 20  # Identical segments in a row beyond any roll call vote
+
+# Whether the in-memory progress has changed since comprehensive_progress.json
+# was last written, and how many events progress.ndjson holds since then
+_state_cache = {"dirty": True, "events": 0}
+# Last whole second formatted by fast_iso() and its ISO string
+_timestamp_cache = {"second": None, "iso": ""}
 
 class GracefulKiller:
     """Handle graceful shutdown on SIGTERM/SIGINT"""
@@ -25,6 +78,122 @@ class GracefulKiller:
         print(f"\n🛑 Received signal {signum}, gracefully shutting down...")
         self.kill_now = True
 
+def pop_option(name, default=None):
+    """Remove `name value` from sys.argv and return the value"""
+    if name not in sys.argv:
+        return default
+    
+    index = sys.argv.index(name)
+    if index + 1 >= len(sys.argv):
+        print(f"Usage: python granicus_transcribe_resumeable.py {name} <value> ...")
+        sys.exit(1)
+    value = sys.argv[index + 1]
+    del sys.argv[index:index + 2]
+    return value
+
+def load_whisper_model(batch_size=BATCH_SIZE, compile_decoder=False):
+    """Load the model once for the whole run, returning it with how many videos it can take at once"""
+    if WhisperModel is None:
+        if whisper is None:
+            return None, 0
+        print(f"🧠 Loading whisper model '{WHISPER_MODEL}'...")
+        model = whisper.load_model(WHISPER_MODEL)
+        
+        # base decode steps are dozens of small kernels, so launch overhead
+        # dominates; CUDA graphs replay each step as one launch
+        if compile_decoder and model.device.type == "cuda":
+            print("🧠 Compiling whisper decoder (mode=reduce-overhead)...")
+            model.decoder = torch.compile(model.decoder, mode="reduce-overhead")
+            # Warm up on 30 s of silence so the first real video doesn't pay for tracing
+            model.transcribe(torch.zeros(whisper.audio.N_SAMPLES, device=model.device), verbose=False)
+        elif compile_decoder:
+            print("⚠️  --compile needs CUDA, running the decoder uncompiled")
+        # openai-whisper hooks the model during each call, so one video at a time
+        return model, 1
+    
+    # One model replica per GPU (or per few CPU cores); CTranslate2 hands each
+    # concurrent transcribe call to a free replica. num_workers counts
+    # replicas per listed device, so it stays 1 when every GPU is listed
+    gpus = ctranslate2.get_cuda_device_count()
+    device = "cuda" if gpus > 0 else "cpu"
+    compute_type = "int8_float16" if device == "cuda" else "int8"
+    workers = gpus or TRANSCRIBE_WORKERS
+    print(f"🧠 Loading faster-whisper model '{WHISPER_MODEL}' ({device}, {compute_type}, {workers} worker(s))...")
+    model = WhisperModel(WHISPER_MODEL, device=device, compute_type=compute_type,
+                         device_index=list(range(gpus)) or 0, num_workers=1 if gpus else workers)
+    
+    # Batching runs several VAD chunks of a video through each forward pass
+    if batch_size > 1:
+        print(f"🧠 Batching {batch_size} chunks per forward pass")
+        model = BatchedInferencePipeline(model=model)
+    return model, workers
+
+def format_timestamp(seconds, separator='.'):
+    """Format seconds as HH:MM:SS.mmm (use ',' as the separator for SRT)"""
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+def is_hallucination(text, duration, no_speech_prob, avg_logprob, repeats):
+    """Whether a segment is filler decoded from non-speech or the output of a stuck decoder"""
+    # repeats counts the segments right before this one with the same text
+    normalized = "".join(c for c in text.lower() if c.isalnum() or c.isspace()).strip()
+    if not normalized:
+        return True
+    
+    # A decoder stuck in a loop repeats one short phrase across the segment
+    words = normalized.split()
+    trigrams = [tuple(words[i:i + 3]) for i in range(len(words) - 2)]
+    if len(trigrams) >= 6 and len(set(trigrams)) <= len(trigrams) // 3:
+        return True
+    
+    # ... or across segments, which then stop advancing in time or run on
+    # far longer than a vote would
+    if repeats and (duration <= 0 or repeats >= REPEAT_RUN_LIMIT):
+        return True
+    
+    non_speech = no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOGPROB_THRESHOLD
+    return non_speech and (normalized in HALLUCINATIONS or repeats > 0)
+
+def write_segments(segments, vtt_path, srt_path, txt_path):
+    """Stream segments into VTT, SRT and TXT files as they are decoded"""
+    # Written under .part names and moved into place at the end, so an
+    # interrupted run never leaves a VTT that looks finished
+    paths = [str(vtt_path), str(srt_path), str(txt_path)]
+    parts = [path + ".part" for path in paths]
+    
+    with open(parts[0], 'w', encoding='utf-8') as vtt, \
+         open(parts[1], 'w', encoding='utf-8') as srt, \
+         open(parts[2], 'w', encoding='utf-8') as txt:
+        vtt.write("WEBVTT\n\n")
+        i = 0
+        previous = None
+        repeats = 0
+        for segment in segments:
+            text = segment.text.strip()
+            repeats = repeats + 1 if text == previous else 0
+            previous = text
+            if is_hallucination(text, segment.end - segment.start, segment.no_speech_prob,
+                                segment.avg_logprob, repeats):
+                continue
+            i += 1
+            vtt.write(f"{format_timestamp(segment.start)} --> {format_timestamp(segment.end)}\n{text}\n\n")
+            srt.write(f"{i}\n{format_timestamp(segment.start, ',')} --> {format_timestamp(segment.end, ',')}\n{text}\n\n")
+            txt.write(f"{text}\n")
+    
+    for part, path in zip(parts, paths):
+        os.replace(part, path)
+
+def fast_iso():
+    """Current local time as an ISO string, formatted at most once per second"""
+    second = int(time.time())
+    if second != _timestamp_cache["second"]:
+        _timestamp_cache["iso"] = datetime.fromtimestamp(second).isoformat()
+        _timestamp_cache["second"] = second
+    return _timestamp_cache["iso"]
+
 def setup_directories():
     """Create organized directory structure"""
     base_dir = Path("fcva_videos")
@@ -38,38 +207,183 @@ def setup_directories():
     for name, path in directories.items():
         path.mkdir(parents=True, exist_ok=True)
     
+    # Kept open for the whole run and line-buffered, so logging an error is
+    # one write instead of an open, write and close each time
+    log_dir = directories['logs']
+    log_files = {
+        'timeout': open(log_dir / "timeout_errors.log", 'a', buffering=1),
+        'download_err': open(log_dir / "download_errors.log", 'a', buffering=1),
+        'transcribe_err': open(log_dir / "transcription_errors.log", 'a', buffering=1)
+    }
+    atexit.register(lambda: [f.close() for f in log_files.values()])
+    directories['log_files'] = log_files
+    
     return directories
 
+def json_dumps(data):
+    """Serialize to compact JSON bytes, with orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+def json_loads(data):
+    """Parse JSON bytes, with orjson when it's installed"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def write_atomic(path, data, mode=None):
+    """Write bytes to path so a crash leaves either the old file or the new one"""
+    temp_file = path.with_name(path.name + '.tmp')
+    with open(temp_file, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if mode is not None:
+        os.chmod(temp_file, mode)
+    os.replace(temp_file, path)
+
+def apply_progress_event(state, event):
+    """Apply one progress event to the in-memory state"""
+    kind, clip_id = event["event"], event["clip_id"]
+    if kind == "in_progress":
+        state["in_progress"] = clip_id
+        return
+    
+    # A crash between the full rewrite and clearing the event log replays
+    # events the file already has, and retries repeat ids, so ignore repeats
+    seen = state[f"_{kind}_set"]
+    if clip_id not in seen:
+        seen.add(clip_id)
+        state[kind].append(clip_id)
+    state["in_progress"] = None
+
 def load_progress_state(dirs):
     """Load comprehensive progress state"""
     progress_file = dirs['logs'] / 'comprehensive_progress.json'
-    try:
-        with open(progress_file, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {
+    
+    # A progress file that can't be parsed falls back to the copy kept from
+    # the last successful save, instead of starting over from nothing
+    for path in (progress_file, progress_file.with_suffix('.json.bak')):
+        try:
+            state = json_loads(path.read_bytes())
+            break
+        except FileNotFoundError:
+            continue
+        except json.JSONDecodeError:
+            print(f"⚠️  {path.name} is unreadable, skipping it")
+    else:
+        state = {
             "completed": [],
             "failed": [],
             "in_progress": None,
             "total_processed": 0,
             "last_updated": None,
-            "session_start": datetime.now().isoformat()
+            "session_start": fast_iso()
+        }
+    
+    # Sets for O(1) membership alongside the ordered lists; keys starting
+    # with _ stay in memory and are never written out
+    state["_completed_set"] = set(state["completed"])
+    state["_failed_set"] = set(state["failed"])
+    
+    # Replay whatever was logged since the last full rewrite
+    events_file = dirs['logs'] / 'progress.ndjson'
+    try:
+        line = b""
+        with open(events_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    event = json_loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves half a line at the end
+                    print(f"⚠️  Skipping unreadable line in {events_file.name}")
+                    continue
+                apply_progress_event(state, event)
+        
+        # Start the next event on its own line instead of gluing it to a torn one
+        if line and not line.endswith(b"\n"):
+            with open(events_file, 'ab') as f:
+                f.write(b"\n")
+    except FileNotFoundError:
+        pass
+    return state
+
+def record_progress(dirs, state, kind, clip_id):
+    """Apply a progress event and append it to progress.ndjson"""
+    # One short line per event instead of re-serializing every id each time;
+    # the full file is only rewritten every FULL_SAVE_EVERY events
+    event = {"event": kind, "clip_id": clip_id, "time": fast_iso()}
+    apply_progress_event(state, event)
+    with open(dirs['logs'] / 'progress.ndjson', 'ab') as f:
+        f.write(json_dumps(event) + b"\n")
+    
+    _state_cache["dirty"] = True
+    _state_cache["events"] += 1
+    if _state_cache["events"] >= FULL_SAVE_EVERY:
+        save_progress_state(dirs, state)
+    else:
+        save_status(dirs, state)
+
+def save_status(dirs, state):
+    """Write the counters --status prints to the small status.json sidecar"""
+    status = {
+        "completed_n": len(state["completed"]),
+        "failed_n": len(state["failed"]),
+        "in_progress": state["in_progress"],
+        "session_start": state.get("session_start"),
+        "last_updated": fast_iso()
+    }
+    # Replaced whole so --status never reads half a file; no fsync, since
+    # losing it in a crash only costs a fallback to the full progress file
+    status_file = dirs['logs'] / 'status.json'
+    temp_file = status_file.with_name(status_file.name + '.tmp')
+    temp_file.write_bytes(json_dumps(status))
+    os.replace(temp_file, status_file)
+
+def load_status(dirs):
+    """Load the --status counters without reading the full progress history"""
+    try:
+        return json_loads((dirs['logs'] / 'status.json').read_bytes())
+    except (FileNotFoundError, json.JSONDecodeError):
+        # Runs from before the sidecar existed only have the full file
+        state = load_progress_state(dirs)
+        return {
+            "completed_n": len(state["completed"]),
+            "failed_n": len(state["failed"]),
+            "in_progress": state["in_progress"],
+            "session_start": state.get("session_start")
         }
 
 def save_progress_state(dirs, state):
     """Save comprehensive progress state"""
-    state["last_updated"] = datetime.now().isoformat()
     progress_file = dirs['logs'] / 'comprehensive_progress.json'
-    with open(progress_file, 'w') as f:
-        json.dump(state, f, indent=2)
+    if not _state_cache["dirty"]:
+        try:
+            os.utime(progress_file)  # Nothing changed, just mark the session as alive
+            return
+        except FileNotFoundError:
+            pass
+    
+    state["last_updated"] = fast_iso()
+    data = json_dumps({key: value for key, value in state.items() if not key.startswith('_')})
+    write_atomic(progress_file, data)
+    progress_file.with_suffix('.json.bak').write_bytes(data)
+    
+    # Everything in the event log is now in the full file
+    open(dirs['logs'] / 'progress.ndjson', 'w').close()
+    _state_cache["dirty"] = False
+    _state_cache["events"] = 0
+    save_status(dirs, state)
 
 def load_video_ids_from_file(filename):
     """Load video IDs from JSON file"""
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
+        with open(filename, 'rb') as f:
+            data = json_loads(f.read())
         if isinstance(data, list):
-            return [str(x) for x in data]
+            # A clip listed twice would otherwise be downloaded and transcribed twice
+            return list(dict.fromkeys(str(x) for x in data))
         else:
             print(f"Invalid format in {filename}")
             return []
@@ -80,71 +394,127 @@ def load_video_ids_from_file(filename):
         print(f"Invalid JSON in {filename}")
         return []
 
-def download_video_with_timeout(clip_id, dirs, timeout_minutes=30):
+def save_metadata(clip_id, dirs):
+    """Move the info JSON yt-dlp wrote next to the video into metadata/"""
+    info_file = dirs['videos'] / f"video_{clip_id}.info.json"
+    if dirs['metadata']:
+        metadata_file = dirs['metadata'] / f"video_{clip_id}_info.json"
+        # One rename that may fail beats a stat of each side first
+        try:
+            os.replace(info_file, metadata_file)
+        except FileNotFoundError:
+            pass
+
+def stream_audio_with_timeout(clip_id, dirs, timeout_minutes=30, rate_limit=None):
+    """Decode a video's audio straight from yt-dlp into 16 kHz mono int16 PCM"""
+    url = f"https://fcva.granicus.com/player/clip/{clip_id}"
+    info_pattern = str(dirs['videos'] / f"video_{clip_id}.%(ext)s")
+    
+    # yt-dlp writes the stream to ffmpeg and ffmpeg writes PCM to us, so the
+    # video never touches disk; only the info JSON lands in videos/
+    print(f"📥 Streaming audio for video {clip_id} (timeout: {timeout_minutes}min)...")
+    cmd = ["yt-dlp", url, "-f", "bestaudio/best", "-o", "-", "-o", f"infojson:{info_pattern}",
+           "--write-info-json", "-N", str(CONCURRENT_FRAGMENTS), "--quiet", "--no-progress"]
+    if rate_limit:
+        cmd += ["-r", rate_limit]  # Per download, so the total is up to DOWNLOAD_WORKERS times this
+    decode = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+              "-f", "s16le", "-ac", "1", "-ar", "16000", "pipe:1"]
+    
+    # Nothing reads yt-dlp's stderr until it exits, so it goes to a file; a
+    # pipe would fill up with fragment retry warnings and stall the download
+    with tempfile.TemporaryFile() as download_errors:
+        downloader = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=download_errors)
+        decoder = subprocess.Popen(decode, stdin=downloader.stdout, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        downloader.stdout.close()  # ffmpeg holds the read end now
+        
+        try:
+            pcm, decode_errors = decoder.communicate(timeout=timeout_minutes * 60)
+            downloader.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            downloader.kill()
+            decoder.kill()
+            downloader.wait()
+            error_msg = f"Download timeout ({timeout_minutes}min) for video {clip_id}"
+            print(f"⏰ {error_msg}")
+            
+            # Log timeout
+            dirs['log_files']['timeout'].write(f"{fast_iso()}: {error_msg}\n")
+            
+            return None
+        
+        download_errors.seek(0)
+        errors = download_errors.read() + decode_errors
+    
+    if downloader.returncode or decoder.returncode or not pcm:
+        errors = errors.decode(errors='replace').strip()
+        error_msg = f"Failed to stream audio for video {clip_id}: {errors.splitlines()[-1] if errors else 'no audio'}"
+        print(f"✗ {error_msg}")
+        
+        # Log the error
+        dirs['log_files']['download_err'].write(f"{fast_iso()}: {error_msg}\n")
+        
+        return None
+    
+    print(f"✓ Streamed audio for video {clip_id}")
+    save_metadata(clip_id, dirs)
+    # Kept as int16 while queued, half the memory of the float32 whisper takes
+    return np.frombuffer(pcm, dtype=np.int16)
+
+def download_video_with_timeout(clip_id, dirs, timeout_minutes=30, rate_limit=None):
     """Download video with configurable timeout"""
     url = f"https://fcva.granicus.com/player/clip/{clip_id}"
     video_dir = dirs['videos']
     output_pattern = str(video_dir / f"video_{clip_id}.%(ext)s")
     
     print(f"📥 Downloading video {clip_id} (timeout: {timeout_minutes}min)...")
-    cmd = ["yt-dlp", url, "-o", output_pattern, "--write-info-json"]
+    cmd = ["yt-dlp", url, "-o", output_pattern, "--write-info-json", "-N", str(CONCURRENT_FRAGMENTS),
+           "--merge-output-format", "mp4", "--print", "after_move:filepath", "--no-progress"]
+    if rate_limit:
+        cmd += ["-r", rate_limit]  # Per download, so the total is up to DOWNLOAD_WORKERS times this
     
+    # With --print and no progress bar, stdout is just the final path and
+    # stderr only carries warnings and errors, so neither grows with the video
     try:
         result = subprocess.run(
             cmd, 
             check=True, 
-            capture_output=True, 
+            stdout=subprocess.PIPE, 
+            stderr=subprocess.PIPE, 
             text=True, 
             timeout=timeout_minutes * 60
         )
         print(f"✓ Downloaded video {clip_id}")
         
-        # Find the actual downloaded files
-        video_files = list(video_dir.glob(f"video_{clip_id}.*"))
-        video_file = None
-        info_file = None
-        
-        for file in video_files:
-            if file.suffix == '.json':
-                info_file = file
-            elif file.suffix in ['.mp4', '.mkv', '.webm', '.avi']:
-                video_file = file
-        
-        # Save download metadata
-        if info_file and dirs['metadata']:
-            metadata_file = dirs['metadata'] / f"video_{clip_id}_info.json"
-            if info_file.exists() and not metadata_file.exists():
-                info_file.rename(metadata_file)
-        
-        return str(video_file) if video_file else None
+        # yt-dlp prints the final path once the file is in place, and the
+        # info JSON name follows from the output template, so no glob
+        printed = result.stdout.strip().splitlines()
+        video_file = printed[-1] if printed else None
+        save_metadata(clip_id, dirs)
+        return video_file
         
     except subprocess.TimeoutExpired:
         error_msg = f"Download timeout ({timeout_minutes}min) for video {clip_id}"
         print(f"⏰ {error_msg}")
         
         # Log timeout
-        timeout_log = dirs['logs'] / "timeout_errors.log"
-        with open(timeout_log, 'a') as f:
-            f.write(f"{datetime.now().isoformat()}: {error_msg}\n")
+        dirs['log_files']['timeout'].write(f"{fast_iso()}: {error_msg}\n")
         
         return None
         
     except subprocess.CalledProcessError as e:
-        error_msg = f"Failed to download video {clip_id}: {e}"
+        errors = (e.stderr or "").strip().splitlines()
+        error_msg = f"Failed to download video {clip_id}: {errors[-1] if errors else e}"
         print(f"✗ {error_msg}")
         
         # Log the error
-        error_log = dirs['logs'] / "download_errors.log"
-        with open(error_log, 'a') as f:
-            f.write(f"{datetime.now().isoformat()}: {error_msg}\n")
+        dirs['log_files']['download_err'].write(f"{fast_iso()}: {error_msg}\n")
         
         return None
 
-def transcribe_video_with_timeout(video_file, clip_id, dirs, timeout_minutes=120):
-    """Transcribe video with configurable timeout"""
-    if not os.path.exists(video_file):
-        print(f"Video file {video_file} not found")
-        return None
+def transcribe_video(video_file, clip_id, dirs, existing, model, batch_size=BATCH_SIZE):
+    """Transcribe video in-process with the model loaded in main()"""
+    # video_file is a path, or the PCM array stream_audio_with_timeout returns
+    streamed = not isinstance(video_file, str)
     
     transcript_dir = dirs['transcripts']
     outputs = {
@@ -153,87 +523,223 @@ def transcribe_video_with_timeout(video_file, clip_id, dirs, timeout_minutes=120
         'txt': transcript_dir / f"video_{clip_id}.txt"
     }
     
-    # Skip if transcript already exists
-    if outputs['vtt'].exists():
+    # Skip if transcript already exists (existing is one scandir taken at startup)
+    if outputs['vtt'].name in existing:
         print(f"✓ Transcript already exists: {outputs['vtt']}")
         return str(outputs['vtt'])
     
-    print(f"🎯 Transcribing video {clip_id} (timeout: {timeout_minutes}min)...")
+    print(f"🎯 Transcribing video {clip_id}...")
     start_time = time.time()
     
-    whisper_commands = [
-        ["whisper", video_file, "--model", "base", "--output_format", "vtt", 
-         "--output_format", "srt", "--output_format", "txt", 
-         "--output_dir", str(transcript_dir), "--verbose", "False"],
-        ["whisper", video_file, "--model", "base", "--output_format", "vtt", 
-         "--output_dir", str(transcript_dir), "--verbose", "False"],
-        [sys.executable, "-m", "whisper", video_file, "--model", "base", 
-         "--output_format", "vtt", "--output_dir", str(transcript_dir)]
-    ]
-    
-    for i, cmd in enumerate(whisper_commands):
-        try:
-            print(f"  🔄 Trying transcription method {i+1}/{len(whisper_commands)}")
-            result = subprocess.run(
-                cmd, 
-                check=True, 
-                capture_output=True, 
-                text=True,
-                timeout=timeout_minutes * 60
-            )
-            
-            # Whisper creates files with original filename base
-            video_base = Path(video_file).stem
-            generated_files = {
-                transcript_dir / f"{video_base}.vtt": outputs['vtt'],
-                transcript_dir / f"{video_base}.srt": outputs['srt'],
-                transcript_dir / f"{video_base}.txt": outputs['txt']
-            }
+    # One call with the already-loaded model; a failure is reported once
+    # instead of retrying CLI variants that would each reload the model
+    try:
+        audio = video_file.astype(np.float32) / 32768.0 if streamed else video_file
+        if WhisperModel is not None:
+            if batch_size > 1:
+                segments, info = model.transcribe(audio, beam_size=1, batch_size=batch_size,
+                                                  vad_filter=True, vad_parameters=VAD_PARAMETERS)
+            else:
+                segments, info = model.transcribe(audio, beam_size=1,
+                                                  vad_filter=True, vad_parameters=VAD_PARAMETERS)
+            write_segments(segments, outputs['vtt'], outputs['srt'], outputs['txt'])
+        else:
+            # A tensor on the model's device keeps the STFT and mel filterbank
+            # there too; FP16 only where CUDA can use it
+            if not streamed:
+                audio = whisper.load_audio(video_file)
+            audio = torch.from_numpy(audio).to(model.device)
+            result = model.transcribe(audio, verbose=False, fp16=model.device.type == "cuda")
+            kept = []
+            previous = None
+            repeats = 0
+            for segment in result["segments"]:
+                segment["text"] = text = segment["text"].strip()
+                repeats = repeats + 1 if text == previous else 0
+                previous = text
+                if not is_hallucination(text, segment["end"] - segment["start"], segment["no_speech_prob"],
+                                        segment["avg_logprob"], repeats):
+                    kept.append(segment)
+            result["segments"] = kept
+            # Writers name their output after the stem of the path they're given
+            for fmt, path in outputs.items():
+                get_writer(fmt, str(transcript_dir))(result, str(path))
+    except FileNotFoundError:
+        # Found out by opening it rather than by a separate stat up front
+        print(f"Video file {video_file} not found")
+        return None
+    except Exception as e:
+        error_msg = f"Failed to transcribe video {clip_id}: {e}"
+        print(f"✗ {error_msg}")
+        dirs['log_files']['transcribe_err'].write(f"{fast_iso()}: {error_msg}\n")
+        return None
+    
+    elapsed = time.time() - start_time
+    print(f"✓ Transcribed video {clip_id} in {elapsed:.1f}s")
+    for file in outputs.values():
+        print(f"  📄 Created: {file.name}")
+    existing.update(file.name for file in outputs.values())
+    return str(outputs['vtt'])
+
+# Set in each --workers process by init_worker
+_worker_model = None
+_worker_dirs = None
+
+def init_worker(device_ids, batch_size, compile_decoder):
+    """Pin this worker process to one GPU and load its own model"""
+    global _worker_model, _worker_dirs
+    # Ctrl-C reaches the whole process group; main decides when to stop, and
+    # a worker killed mid-clip would only turn that clip into a failure
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # CUDA reads this when it first initializes, which is during the model
+    # load below, so it still takes effect after the imports
+    os.environ["CUDA_VISIBLE_DEVICES"] = str(device_ids.get())
+    _worker_dirs = setup_directories()
+    _worker_model, _ = load_whisper_model(batch_size, compile_decoder)
+
+def transcribe_in_worker(video_file, clip_id, existing, batch_size):
+    """Transcribe one video with this worker process's model"""
+    return transcribe_video(video_file, clip_id, _worker_dirs, existing, _worker_model, batch_size)
+
+def transcribe_and_record(clip_id, video_file, i, remaining_videos, total_videos, dirs, existing,
+                          model, batch_size, progress_state, state_lock, pool=None, killer=None):
+    """Transcribe one downloaded video on a transcription thread and record the outcome"""
+    with state_lock:
+        record_progress(dirs, progress_state, 'in_progress', clip_id)
+        
+        print(f"\n{'='*60}")
+        print(f"🎬 Transcribing video {clip_id} ({i}/{remaining_videos})")
+        print_status(dirs, clip_id, total_videos, progress_state)
+        print(f"{'='*60}")
+    
+    try:
+        if pool is None:
+            transcript_file = transcribe_video(video_file, clip_id, dirs, existing, model, batch_size)
+        else:
+            # The worker only needs to know whether this clip's transcript exists,
+            # and main stays the only process writing progress
+            seen = existing & {f"video_{clip_id}.vtt"}
+            transcript_file = pool.submit(transcribe_in_worker, video_file, clip_id, seen, batch_size).result()
+        
+        if transcript_file:
+            print(f"✅ Process complete for video {clip_id}")
+            print(f"  📄 Transcript: {Path(transcript_file).name}")
             
-            files_created = []
-            for generated, target in generated_files.items():
-                if generated.exists() and not target.exists():
-                    generated.rename(target)
-                    files_created.append(target)
+            # Clean up video file; streamed audio never reached disk
+            if isinstance(video_file, str):
+                print(f"  🎥 Video: {Path(video_file).name}")
+                cleanup_video_file(video_file)
+        else:
+            print(f"❌ Transcription failed for video {clip_id}")
+            # Keep video file for manual retry if needed, but not in memory
+            if isinstance(video_file, str):
+                drop_page_cache(video_file)
+        
+        if not transcript_file and killer and killer.kill_now:
+            return  # Likely cut short by the shutdown, so retried next run
+        with state_lock:
+            record_progress(dirs, progress_state, 'completed' if transcript_file else 'failed', clip_id)
             
-            elapsed = time.time() - start_time
-            print(f"✓ Transcribed video {clip_id} in {elapsed:.1f}s")
-            for file in files_created:
-                print(f"  📄 Created: {file.name}")
+            if i % 5 == 0:  # Status update every 5 videos
+                print_status(dirs, "Next", total_videos, progress_state)
             
-            return str(outputs['vtt']) if outputs['vtt'].exists() else str(files_created[0])
+    except Exception as e:
+        print(f"❌ Unexpected error for video {clip_id}: {e}")
+        if killer and killer.kill_now:
+            return
+        with state_lock:
+            record_progress(dirs, progress_state, 'failed', clip_id)
+
+def put_unless_killed(ready, item, killer):
+    """Queue item for the transcription loop, giving up once shutdown is requested"""
+    while not killer.kill_now:
+        try:
+            ready.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def find_leftover_videos(video_dir):
+    """Map clip ids to videos an earlier run downloaded but failed to transcribe"""
+    # One scandir pass classified by name, no Path per entry; yt-dlp's
+    # .part files and unmerged video_<id>.f<format>.mp4 streams don't match
+    leftovers = {}
+    with os.scandir(video_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.startswith("video_"):
+                continue
+            clip_id, _, ext = name[len("video_"):].partition(".")
+            if ext in VIDEO_EXTENSIONS:
+                leftovers[clip_id] = entry.path
+    return leftovers
+
+def download_worker(ids_in, dirs, ready, killer, progress_state, state_lock, rate_limit=None, stream=False,
+                    leftovers=None):
+    """Download videos until ids_in runs dry, handing each one to the transcription loop"""
+    try:
+        while not killer.kill_now:
+            try:
+                clip_id = ids_in.get_nowait()
+            except queue.Empty:
+                break
             
-        except subprocess.TimeoutExpired:
-            error_msg = f"Transcription timeout ({timeout_minutes}min) for video {clip_id}"
-            print(f"⏰ {error_msg}")
+            video_file = leftovers.pop(clip_id, None) if leftovers else None
+            if video_file:
+                print(f"♻️  Reusing video {clip_id} left by an earlier run: {Path(video_file).name}")
+                if not put_unless_killed(ready, (clip_id, video_file), killer):
+                    break
+                continue
             
-            # Log timeout
-            timeout_log = dirs['logs'] / "timeout_errors.log"
-            with open(timeout_log, 'a') as f:
-                f.write(f"{datetime.now().isoformat()}: {error_msg}\n")
+            try:
+                # Download video (30 min timeout); whisper can take the audio from memory
+                fetch = stream_audio_with_timeout if stream else download_video_with_timeout
+                video_file = fetch(clip_id, dirs, timeout_minutes=30, rate_limit=rate_limit)
+            except Exception as e:
+                print(f"❌ Unexpected error for video {clip_id}: {e}")
+                video_file = None
             
-            continue
+            if video_file is None:
+                if killer.kill_now:
+                    break  # Cut short by the signal, so not a real failure
+                with state_lock:
+                    record_progress(dirs, progress_state, 'failed', clip_id)
+                continue
             
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            print(f"  ✗ Method {i+1} failed: {e}")
-            continue
-    
-    error_msg = f"Failed to transcribe video {clip_id} - all methods exhausted"
-    print(f"✗ {error_msg}")
-    
-    # Log transcription error
-    error_log = dirs['logs'] / "transcription_errors.log"
-    with open(error_log, 'a') as f:
-        f.write(f"{datetime.now().isoformat()}: {error_msg}\n")
-    
-    return None
+            # Blocks while whisper is behind, so at most a couple of videos wait in memory or on disk
+            if not put_unless_killed(ready, (clip_id, video_file), killer):
+                break
+    finally:
+        # One sentinel per download worker, even during shutdown; main keeps
+        # draining ready until every worker has finished, so this can't block
+        ready.put(None)
+
+def drop_page_cache(path):
+    """Ask the kernel to evict a video that was read once from the page cache"""
+    # Hour-long videos would otherwise push the model weights and other warm
+    # files out of memory on small hosts; only where POSIX exposes the hint
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
 
 def cleanup_video_file(video_file):
     """Safely delete video file after successful transcription"""
     try:
-        if os.path.exists(video_file):
-            os.remove(video_file)
-            print(f"  🗑️  Deleted video file: {Path(video_file).name}")
+        # Evicted first in case something else still has the file open,
+        # which would keep its pages cached past the unlink
+        drop_page_cache(video_file)
+        os.remove(video_file)
+        print(f"  🗑️  Deleted video file: {Path(video_file).name}")
+        return True
+    except FileNotFoundError:
         return True
     except Exception as e:
         print(f"  ⚠️  Could not delete video file: {e}")
@@ -267,10 +773,7 @@ python granicus_transcribe_resumeable.py --resume
 """
     
     script_path = dirs['logs'] / 'resume.sh'
-    with open(script_path, 'w') as f:
-        f.write(script_content)
-    
-    os.chmod(script_path, 0o755)
+    write_atomic(script_path, script_content.encode(), mode=0o755)
     print(f"📝 Created resume script: {script_path}")
 
 def main():
@@ -283,6 +786,17 @@ def main():
     # Set up directories
     dirs = setup_directories()
     
+    downloads = int(pop_option('--downloads', DOWNLOAD_WORKERS))
+    rate_limit = pop_option('--rate-limit')
+    batch_size = int(pop_option('--batch-size', BATCH_SIZE))
+    processes = int(pop_option('--workers', 0))
+    compile_decoder = '--compile' in sys.argv
+    if compile_decoder:
+        sys.argv.remove('--compile')
+    stream = '--no-stream' not in sys.argv
+    if not stream:
+        sys.argv.remove('--no-stream')
+    
     # Parse arguments
     if len(sys.argv) < 2:
         print("Usage:")
@@ -290,23 +804,29 @@ def main():
         print("  python granicus_transcribe_resumeable.py --from-file <filename>")
         print("  python granicus_transcribe_resumeable.py --resume")
         print("  python granicus_transcribe_resumeable.py --status")
+        print("Options:")
+        print(f"  --downloads N   videos downloaded in parallel (default {DOWNLOAD_WORKERS})")
+        print("  --rate-limit R  yt-dlp rate limit per download, e.g. 5M")
+        print(f"  --batch-size N  faster-whisper chunks per forward pass (default {BATCH_SIZE}, 1 disables batching)")
+        print("  --workers N     transcribe in N processes, one per GPU (CUDA_VISIBLE_DEVICES=0..N-1)")
+        print("  --no-stream     download each video to disk instead of piping its audio into whisper")
+        print("  --compile       torch.compile the openai-whisper decoder with CUDA graphs")
         sys.exit(1)
     
-    # Load progress state
-    progress_state = load_progress_state(dirs)
-    
     if sys.argv[1] == '--status':
-        # Just show status and exit
-        completed = len(progress_state['completed'])
-        failed = len(progress_state['failed'])
+        # Just show status and exit; status.json holds only the counters
+        status = load_status(dirs)
         print(f"📊 Current Status:")
-        print(f"✅ Completed: {completed}")
-        print(f"❌ Failed: {failed}")
-        print(f"📅 Last session: {progress_state.get('session_start', 'Unknown')}")
-        if progress_state.get('in_progress'):
-            print(f"🔄 Last processing: Video {progress_state['in_progress']}")
+        print(f"✅ Completed: {status['completed_n']}")
+        print(f"❌ Failed: {status['failed_n']}")
+        print(f"📅 Last session: {status.get('session_start') or 'Unknown'}")
+        if status.get('in_progress'):
+            print(f"🔄 Last processing: Video {status['in_progress']}")
         sys.exit(0)
     
+    # Load progress state
+    progress_state = load_progress_state(dirs)
+    
     # Determine which videos to process
     if sys.argv[1] == '--from-file':
         if len(sys.argv) < 3:
@@ -318,14 +838,15 @@ def main():
         if not all_clip_ids:
             all_clip_ids = load_video_ids_from_file('remaining_video_ids.json')
     else:
-        all_clip_ids = sys.argv[1:]
+        all_clip_ids = list(dict.fromkeys(sys.argv[1:]))
     
     if not all_clip_ids:
         print("No video IDs to process")
         sys.exit(0)
     
     # Filter out already completed videos
-    completed_set = set(progress_state['completed'])
+    # A snapshot: the live set keeps growing as videos finish
+    completed_set = frozenset(progress_state['_completed_set'])
     clip_ids = [vid for vid in all_clip_ids if vid not in completed_set]
     
     total_videos = len(all_clip_ids)
@@ -341,58 +862,80 @@ def main():
         sys.exit(0)
     
     create_resume_script(dirs)
+    if WhisperModel is None and whisper is None:
+        print("❌ Neither faster-whisper nor openai-whisper is installed")
+        sys.exit(1)
     
-    # Process videos
-    for i, clip_id in enumerate(clip_ids, 1):
-        if killer.kill_now:
-            print("🛑 Graceful shutdown requested")
-            break
-        
-        progress_state['in_progress'] = clip_id
-        save_progress_state(dirs, progress_state)
-        
-        print(f"\n{'='*60}")
-        print(f"🎬 Processing video {clip_id} ({i}/{remaining_videos})")
-        print_status(dirs, clip_id, total_videos, progress_state)
-        print(f"{'='*60}")
+    pool = None
+    if processes:
+        # VAD, resampling and segment formatting hold the GIL, so several
+        # processes each with their own model overlap them; spawned rather
+        # than forked, since the downloaders are already running by then
+        context = multiprocessing.get_context("spawn")
+        device_ids = context.Queue()
+        for device_id in range(processes):
+            device_ids.put(device_id)
+        pool = ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=init_worker,
+                                   initargs=(device_ids, batch_size, compile_decoder))
+        model, transcribe_workers = None, processes  # One feeder thread per process
+    else:
+        model, transcribe_workers = load_whisper_model(batch_size, compile_decoder)
+    
+    # One directory read up front instead of a stat per clip
+    existing = {entry.name for entry in os.scandir(dirs['transcripts'])}
+    leftovers = find_leftover_videos(dirs['videos'])
+    
+    ids_in = queue.Queue()
+    for clip_id in clip_ids:
+        ids_in.put(clip_id)
+    ready = queue.Queue(maxsize=READY_QUEUE_SIZE)
+    state_lock = threading.Lock()
+    
+    # While videos transcribe, the downloaders are already fetching the next
+    # ones; a slot is taken before each hand-off so ready stays bounded
+    slots = threading.BoundedSemaphore(transcribe_workers)
+    with ThreadPoolExecutor(max_workers=downloads) as executor, \
+         ThreadPoolExecutor(max_workers=transcribe_workers) as transcribers:
+        downloaders = [executor.submit(download_worker, ids_in, dirs, ready, killer, progress_state, state_lock,
+                                       rate_limit, stream, leftovers)
+                       for _ in range(downloads)]
         
-        try:
-            # Download video (30 min timeout)
-            video_file = download_video_with_timeout(clip_id, dirs, timeout_minutes=30)
-            if not video_file:
-                progress_state['failed'].append(clip_id)
-                save_progress_state(dirs, progress_state)
+        i = 0
+        running_downloaders = downloads
+        stopping = False
+        while running_downloaders:
+            # The timeout lets a shutdown end the loop even if a worker died
+            # without queueing its sentinel
+            if killer.kill_now and all(downloader.done() for downloader in downloaders):
+                break
+            slots.acquire()
+            try:
+                item = ready.get(timeout=1)
+            except queue.Empty:
+                slots.release()
+                continue
+            if item is None:
+                slots.release()
+                running_downloaders -= 1
+                continue
+            if killer.kill_now:
+                # Keep draining so no downloader blocks on a full queue; a video
+                # left on disk is picked up again by the next run
+                if not stopping:
+                    print("🛑 Graceful shutdown requested")
+                    stopping = True
+                slots.release()
                 continue
             
-            # Transcribe video (2 hour timeout)
-            transcript_file = transcribe_video_with_timeout(video_file, clip_id, dirs, timeout_minutes=120)
-            
-            if transcript_file:
-                print(f"✅ Process complete for video {clip_id}")
-                print(f"  🎥 Video: {Path(video_file).name}")
-                print(f"  📄 Transcript: {Path(transcript_file).name}")
-                
-                # Clean up video file
-                cleanup_video_file(video_file)
-                
-                progress_state['completed'].append(clip_id)
-            else:
-                print(f"❌ Transcription failed for video {clip_id}")
-                progress_state['failed'].append(clip_id)
-                # Keep video file for manual retry if needed
-            
-            progress_state['in_progress'] = None
-            save_progress_state(dirs, progress_state)
-            
-            # Save progress every video (more frequent than every 10)
-            if i % 5 == 0:  # Status update every 5 videos
-                print_status(dirs, "Next", total_videos, progress_state)
-                
-        except Exception as e:
-            print(f"❌ Unexpected error for video {clip_id}: {e}")
-            progress_state['failed'].append(clip_id)
-            progress_state['in_progress'] = None
-            save_progress_state(dirs, progress_state)
+            i += 1
+            clip_id, video_file = item
+            future = transcribers.submit(transcribe_and_record, clip_id, video_file, i, remaining_videos,
+                                         total_videos, dirs, existing, model, batch_size, progress_state,
+                                         state_lock, pool, killer)
+            future.add_done_callback(lambda _: slots.release())
+    
+    if pool is not None:
+        pool.shutdown()
     
     # Final summary
     completed = len(progress_state['completed'])